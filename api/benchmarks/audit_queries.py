@@ -0,0 +1,133 @@
+"""
+Description: EXPLAINs the hot queries of the API against the database in DATABASE_URL (PostgreSQL) and flags every
+sequential scan of a table that is not tiny, i.e. a query that is missing an index or does not use it.
+
+The queries are built with the same SQLAlchemy expressions as the routes, with parameters sampled from the database
+(a real CIK, filing URL, ...), so the planner sees realistic values. Without --analyze only the plans are shown and
+nothing is executed; with --analyze every query is run inside a transaction that is rolled back, so the UPDATEs of
+the cron cleanup change nothing.
+
+Exits with status 1 if a sequential scan was flagged, so it can run in CI after migrations.
+
+Usage (from the api directory):
+    python benchmarks/audit_queries.py
+    python benchmarks/audit_queries.py --analyze --min-rows 10000 --verbose
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Add the api directory to the Python path
+api_dir = str(Path(__file__).resolve().parent.parent)
+if api_dir not in sys.path:
+    sys.path.append(api_dir)
+
+from sqlalchemy import text, update
+from sqlalchemy.orm import Session
+from db import SessionLocal, engine
+from models import Filing, FilingExtraction, Ticker, User
+from tickers import search_query
+
+
+def sample_parameters(db: Session) -> Dict[str, Any]:
+    """Pick parameter values that exist in the database, so the plans match the real lookups."""
+    filing = db.query(Filing).filter(Filing.ticker_id.isnot(None)).first()
+    ticker = db.get(Ticker, filing.ticker_id) if filing is not None else db.query(Ticker).first()
+    extraction = db.query(FilingExtraction.file_name).first()
+    return {
+        "cik": ticker.cik if ticker is not None else "320193",
+        "ticker_id": ticker.id if ticker is not None else 1,
+        "name": (ticker.name or "apple").split()[0].lower() if ticker is not None else "apple",
+        "symbol": (ticker.symbol or "AAPL") if ticker is not None else "AAPL",
+        "filing_url": filing.filing_url if filing is not None else "edgar/data/320193/0000320193-23-000106.txt",
+        "file_name": extraction[0] if extraction is not None else "edgar/data/320193/0000320193-23-000106.txt",
+    }
+
+
+def api_queries(db: Session, params: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """Return (description, statement) of the queries to audit."""
+    return [
+        ("filings.get_filings_by_cik: ticker by CIK",
+         db.query(Ticker).filter(Ticker.cik == params["cik"]).statement),
+        ("filings.get_filings_by_cik: filings of a ticker, newest first",
+         db.query(Filing).filter(Filing.ticker_id == params["ticker_id"]).order_by(Filing.filing_date.desc()).statement),
+        ("sec.insert_filings: filing by URL",
+         db.query(Filing.id).filter(Filing.filing_url == params["filing_url"]).statement),
+        ("extraction_store.load_extraction: extraction by file name",
+         db.query(FilingExtraction).filter(FilingExtraction.file_name == params["file_name"]).statement),
+        ("tickers.search_tickers: name substring",
+         search_query(db, params["name"], 15).statement),
+        ("tickers.search_tickers: symbol",
+         search_query(db, params["symbol"], 15).statement),
+        ("cron.cleanup_expired_tokens: verification tokens",
+         update(User).where(User.is_verified == False, User.verification_token.isnot(None))
+         .values(verification_token=None, last_verification_email_sent=None)),
+        ("cron.cleanup_expired_tokens: password reset tokens",
+         update(User).where(User.reset_password_token.isnot(None)).values(reset_password_token=None)),
+    ]
+
+
+def iter_plan_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+def explain(db: Session, statement: Any, analyze: bool) -> Dict[str, Any]:
+    """Return the JSON plan of a statement."""
+    compiled = statement.compile(dialect=engine.dialect)
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    row = db.connection().exec_driver_sql(f"EXPLAIN ({options}) {compiled}", compiled.params).fetchone()
+    plan = row[0] if not isinstance(row[0], str) else json.loads(row[0])
+    return plan[0]
+
+
+def table_sizes(db: Session) -> Dict[str, int]:
+    """Return the planner's row estimate of every table."""
+    rows = db.execute(text("SELECT relname, reltuples::bigint FROM pg_class WHERE relkind = 'r'")).fetchall()
+    return {name: count for name, count in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analyze", action="store_true", help="Run the queries (in a rolled back transaction)")
+    parser.add_argument("--min-rows", type=int, default=1000,
+                        help="Ignore sequential scans of tables with fewer rows; scanning those is cheapest")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit(f"The audit needs PostgreSQL, DATABASE_URL points to {engine.dialect.name}")
+
+    db = SessionLocal()
+    flagged = 0
+    try:
+        sizes = table_sizes(db)
+        params = sample_parameters(db)
+        for description, statement in api_queries(db, params):
+            plan = explain(db, statement, args.analyze)
+            seq_scans = [
+                node for node in iter_plan_nodes(plan["Plan"])
+                if node["Node Type"] == "Seq Scan" and sizes.get(node["Relation Name"], 0) >= args.min_rows
+            ]
+            timing = f", {plan['Execution Time']:.2f} ms" if "Execution Time" in plan else ""
+            print(f"{'SEQ SCAN' if seq_scans else 'ok':8}  {description} (cost {plan['Plan']['Total Cost']:.0f}{timing})")
+            for node in seq_scans:
+                print(f"          Seq Scan on {node['Relation Name']} (~{sizes[node['Relation Name']]} rows)"
+                      f"{', filter ' + node['Filter'] if 'Filter' in node else ''}")
+            if args.verbose:
+                print(json.dumps(plan, indent=2))
+            flagged += bool(seq_scans)
+    finally:
+        db.rollback()
+        db.close()
+
+    print(f"{flagged} queries with sequential scans")
+    if flagged:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Description: Compares ExtractItems.clean_text against the previous implementation, which applied one re.sub
+per special character and per header rule. Verifies that both produce identical output and reports time
+and peak memory (tracemalloc) on synthetic 10-K filings of increasing size.
+
+Usage (from the api directory):
+    python benchmarks/bench_clean_text.py
+    python benchmarks/bench_clean_text.py --sizes 5 20 --repeat 5
+"""
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the api directory to the Python path
+api_dir = str(Path(__file__).resolve().parent.parent)
+if api_dir not in sys.path:
+    sys.path.append(api_dir)
+
+from extract_items import ExtractItems
+from synthetic_filings import make_10k_html
+
+
+def legacy_clean_text(text: str) -> str:
+    """The chain of re.sub calls clean_text used before the single-pass rewrite, kept as the reference."""
+    text = re.sub(r"[\xa0]", " ", text)
+    text = re.sub(r"[​]", " ", text)
+    text = re.sub(r"[\x91]", "‘", text)
+    text = re.sub(r"[\x92]", "’", text)
+    text = re.sub(r"[\x93]", "“", text)
+    text = re.sub(r"[\x94]", "”", text)
+    text = re.sub(r"[\x95]", "•", text)
+    text = re.sub(r"[\x96]", "-", text)
+    text = re.sub(r"[\x97]", "-", text)
+    text = re.sub(r"[\x98]", "˜", text)
+    text = re.sub(r"[\x99]", "™", text)
+    text = re.sub(r"[‐‑‒–—―]", "-", text)
+    text = re.sub(r"[‘]", "‘", text)
+    text = re.sub(r"[’]", "’", text)
+    text = re.sub(r"[ ]", " ", text)
+    text = re.sub(r"[®]", "®", text)
+    text = re.sub(r"[“]", "“", text)
+    text = re.sub(r"[”]", "”", text)
+
+    def remove_whitespace(match):
+        ws = r"[^\S\r\n]"
+        return f'{match[1]}{re.sub(ws, r"", match[2])}{match[3]}{match[4]}'
+
+    def remove_whitespace_signature(match):
+        ws = r"[^\S\r\n]"
+        return f'{match[1]}{re.sub(ws, r"", match[2])}{match[4]}{match[5]}'
+
+    text = re.sub(
+        r"(\n[^\S\r\n]*)(P[^\S\r\n]*A[^\S\r\n]*R[^\S\r\n]*T)([^\S\r\n]+)((\d{1,2}|[IV]{1,2})[AB]?)",
+        remove_whitespace,
+        text,
+        flags=re.IGNORECASE,
+    )
+    text = re.sub(
+        r"(\n[^\S\r\n]*)(I[^\S\r\n]*T[^\S\r\n]*E[^\S\r\n]*M)([^\S\r\n]+)(\d{1,2}[AB]?)",
+        remove_whitespace,
+        text,
+        flags=re.IGNORECASE,
+    )
+    text = re.sub(
+        r"(\n[^\S\r\n]*)(S[^\S\r\n]*I[^\S\r\n]*G[^\S\r\n]*N[^\S\r\n]*A[^\S\r\n]*T[^\S\r\n]*U[^\S\r\n]*R[^\S\r\n]*E[^\S\r\n]*(S|\([^\S\r\n]*s[^\S\r\n]*\))?)([^\S\r\n]+)([^\S\r\n]?)",
+        remove_whitespace_signature,
+        text,
+        flags=re.IGNORECASE,
+    )
+    text = re.sub(
+        r"(ITEM|PART)(\s+\d{1,2}[AB]?)([\-•])",
+        r"\1\2 \3 ",
+        text,
+        flags=re.IGNORECASE,
+    )
+
+    regex_flags = re.IGNORECASE | re.MULTILINE
+    text = re.sub(
+        r"\n[^\S\r\n]*"
+        r"(TABLE\s+OF\s+CONTENTS|INDEX\s+TO\s+FINANCIAL\s+STATEMENTS|BACK\s+TO\s+CONTENTS|QUICKLINKS)"
+        r"[^\S\r\n]*\n",
+        "\n",
+        text,
+        flags=regex_flags,
+    )
+    text = re.sub(
+        r"\n[^\S\r\n]*[-‒–—]*\d+[-‒–—]*[^\S\r\n]*\n", "\n", text, flags=regex_flags
+    )
+    text = re.sub(r"\n[^\S\r\n]*\d+[^\S\r\n]*\n", "\n", text, flags=regex_flags)
+    text = re.sub(r"[\n\s]F[-‒–—]*\d+", "", text, flags=regex_flags)
+    text = re.sub(
+        r"\n[^\S\r\n]*Page\s[\d*]+[^\S\r\n]*\n", "", text, flags=regex_flags
+    )
+    return text
+
+
+def measure(func, text: str, repeat: int):
+    """Return (best time in seconds, peak traced memory in bytes, output) for func(text)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func(text)
+        best = min(best, time.perf_counter() - start)
+        del output
+
+    tracemalloc.start()
+    output = func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 5, 20], help="Document sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per implementation, the best one counts")
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'legacy s':>10} {'fused s':>10} {'speedup':>8} {'legacy peak':>12} {'fused peak':>12}")
+    for size in args.sizes:
+        html = make_10k_html(int(size * 1024 * 1024))
+        text = ExtractItems.strip_html(html)
+
+        legacy_time, legacy_peak, legacy_output = measure(legacy_clean_text, text, args.repeat)
+        fused_time, fused_peak, fused_output = measure(ExtractItems.clean_text, text, args.repeat)
+        if legacy_output != fused_output:
+            raise SystemExit(f"Output mismatch for the {size} MB document")
+
+        print(
+            f"{size:>6.1f}MB {legacy_time:>10.3f} {fused_time:>10.3f} {legacy_time / fused_time:>7.1f}x "
+            f"{legacy_peak / 2 ** 20:>10.1f}MB {fused_peak / 2 ** 20:>10.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Description: Benchmarks ExtractItems end to end on a frozen corpus of filings and compares the results with a stored
+baseline, fully offline.
+
+By default the corpus is generated once into benchmarks/corpus (see synthetic_filings.CORPUS: HTML 10-K, inline XBRL
+10-K, 10-Q, 8-K and a pre-2001 plain text 10-K405). Real EDGAR filings can be benchmarked the same way by putting the
+full submission .txt files into a directory together with a manifest.json of {"file", "type", "date"} entries and
+passing it with --corpus.
+
+Every filing is extracted in its own process, so the reported peak RSS belongs to that filing alone. The stages are:
+    split   ExtractItems.get_document (removing PDFs, finding the <DOCUMENT>)
+    html    HtmlTextExtractor.extract (HTML check, span handling and tag stripping in one parse)
+    spans   ExtractItems.handle_spans (plain text documents only)
+    strip   ExtractItems.strip_html (plain text documents only)
+    clean   ExtractItems.clean_text
+    items   everything else: splitting 10-Q parts and locating the items
+
+Usage (from the api directory):
+    python benchmarks/bench_extract.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_extract.py --baseline benchmarks/baseline.json
+    python benchmarks/bench_extract.py --corpus /data/edgar-corpus --repeat 5
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add the api directory to the Python path
+api_dir = str(Path(__file__).resolve().parent.parent)
+if api_dir not in sys.path:
+    sys.path.append(api_dir)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import extract_items
+from extract_items import ExtractItems, HtmlTextExtractor
+from synthetic_filings import build_corpus
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+STAGES = ["split", "html", "spans", "strip", "clean", "items"]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the current process in MB, or None if it cannot be determined."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def instrument(timings: Dict[str, float]) -> None:
+    """
+    Wrap the stage methods so every call adds its duration to timings.
+
+    Args:
+        timings (Dict[str, float]): Seconds per stage, updated in place.
+    """
+
+    def timed(stage, func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings[stage] += time.perf_counter() - start
+        return wrapper
+
+    ExtractItems.get_document = timed("split", ExtractItems.get_document)
+    HtmlTextExtractor.extract = timed("html", HtmlTextExtractor.extract)
+    ExtractItems.handle_spans = timed("spans", ExtractItems.handle_spans)
+    ExtractItems.strip_html = staticmethod(timed("strip", ExtractItems.strip_html))
+    ExtractItems.clean_text = staticmethod(timed("clean", ExtractItems.clean_text))
+
+
+def run_filing(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract one filing `repeat` times and return the stage timings of the fastest run. Runs in a child process.
+
+    Args:
+        job (Dict[str, Any]): The manifest entry plus the corpus directory and the number of runs.
+
+    Returns:
+        Dict[str, Any]: Size, stage timings, total time, throughput, peak RSS and the hash of the extracted JSON.
+    """
+    with open(os.path.join(job["corpus"], job["file"]), encoding="utf-8", errors="replace") as f:
+        content = f.read()
+    metadata = {"Type": job["type"], "Date": job["date"], "filename": job["file"]}
+
+    timings = dict.fromkeys(STAGES, 0.0)
+    instrument(timings)
+    rss_before = peak_rss_mb()
+
+    # Untimed warm-up run, so one-off costs (compiling the item patterns, lazy imports) do not count
+    with contextlib.redirect_stdout(io.StringIO()):
+        ExtractItems(dict(metadata), content)
+
+    best = None
+    for _ in range(job["repeat"]):
+        for stage in timings:
+            timings[stage] = 0.0
+        start = time.perf_counter()
+        # ExtractItems reports parsing problems with print, which would garble the table
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = ExtractItems(dict(metadata), content).get_json()
+        total = time.perf_counter() - start
+        if best is None or total < best["total"]:
+            stages = dict(timings)
+            stages["items"] = max(0.0, total - sum(stages.values()))
+            best = {"total": total, "stages": stages}
+
+    size_mb = len(content.encode("utf-8")) / 2 ** 20
+    rss_peak = peak_rss_mb()
+    return {
+        "file": job["file"],
+        "type": job["type"],
+        "size_mb": round(size_mb, 3),
+        "stages": {stage: round(seconds, 4) for stage, seconds in best["stages"].items()},
+        "total": round(best["total"], 4),
+        "mb_per_s": round(size_mb / best["total"], 2) if best["total"] else None,
+        "peak_rss_mb": round(rss_peak, 1) if rss_peak is not None else None,
+        "rss_growth_mb": round(rss_peak - rss_before, 1) if rss_peak is not None else None,
+        "output_sha256": hashlib.sha256(json.dumps(output, sort_keys=True).encode("utf-8")).hexdigest(),
+    }
+
+
+def run_corpus(corpus: str, manifest: List[Dict[str, str]], repeat: int) -> List[Dict[str, Any]]:
+    """Run every filing of the manifest in a fresh child process and return the results in manifest order."""
+    jobs = [dict(entry, corpus=corpus, repeat=repeat) for entry in manifest]
+    with multiprocessing.Pool(processes=1, maxtasksperchild=1) as pool:
+        return pool.map(run_filing, jobs, chunksize=1)
+
+
+def print_results(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]]) -> None:
+    header = f"{'file':<22} {'MB':>6} " + " ".join(f"{stage:>7}" for stage in STAGES)
+    header += f" {'total s':>8} {'MB/s':>7} {'RSS MB':>7} {'+RSS':>6}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+
+    for result in results:
+        line = f"{result['file']:<22} {result['size_mb']:>6.2f} "
+        line += " ".join(f"{result['stages'][stage]:>7.3f}" for stage in STAGES)
+        line += f" {result['total']:>8.3f} {result['mb_per_s'] or 0:>7.2f}"
+        line += f" {result['peak_rss_mb'] or 0:>7.1f} {result['rss_growth_mb'] or 0:>6.1f}"
+        if baseline and result["file"] in baseline:
+            line += f" {result['total'] / baseline[result['file']]['total']:>7.2f}x"
+        print(line)
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    Args:
+        results (List[Dict[str, Any]]): The current results.
+        baseline (Dict[str, Dict[str, Any]]): The baseline results by file name.
+        tolerance (float): Allowed relative slowdown of the total time, e.g. 0.1 for 10%.
+
+    Returns:
+        List[str]: A description of every regression, empty if there is none.
+    """
+    problems = []
+    for result in results:
+        previous = baseline.get(result["file"])
+        if previous is None:
+            continue
+        # The absolute slack keeps timer noise on the small filings from counting as a regression
+        if result["total"] > previous["total"] * (1 + tolerance) + 0.005:
+            problems.append(
+                f"{result['file']}: {result['total']:.3f}s vs {previous['total']:.3f}s in the baseline"
+            )
+        if result["output_sha256"] != previous["output_sha256"]:
+            problems.append(f"{result['file']}: extracted items differ from the baseline")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="Directory with the filings and manifest.json")
+    parser.add_argument("--scale", type=float, default=1.0, help="Size factor when generating the synthetic corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per filing, the fastest one counts")
+    parser.add_argument("--baseline", help="Baseline JSON to compare with")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    manifest_path = os.path.join(args.corpus, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    elif args.corpus == DEFAULT_CORPUS_DIR:
+        print(f"Generating the synthetic corpus in {args.corpus}...")
+        manifest = build_corpus(args.corpus, args.scale)
+    else:
+        raise SystemExit(f"No manifest.json in {args.corpus}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {result["file"]: result for result in json.load(f)["results"]}
+
+    results = run_corpus(args.corpus, manifest, args.repeat)
+    print_results(results, baseline)
+
+    total_mb = sum(result["size_mb"] for result in results)
+    total_s = sum(result["total"] for result in results)
+    print(f"\n{total_mb:.1f} MB in {total_s:.2f}s: {total_mb / total_s:.2f} MB/s")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"Saved the baseline to {args.save_baseline}")
+
+    if baseline:
+        problems = compare(results, baseline, args.tolerance)
+        if problems:
+            print("\nRegressions:")
+            for problem in problems:
+                print(f"  {problem}")
+            raise SystemExit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Description: Generates synthetic EDGAR filings for the extraction benchmarks, so they can run fully offline.
+The documents mimic the structures ExtractItems has to deal with: a table of contents that repeats every item header,
+span-split headers with margins, page numbers, "Table of Contents" back-links and the special characters
+(\\xa0, \\x92, \\u2014, ...) that clean_text substitutes. There are HTML 10-K (optionally inline XBRL), 10-Q and
+8-K documents and a plain text 10-K405 in the format EDGAR used before 2001.
+"""
+import json
+import os
+import random
+from typing import Dict, List, Optional, Tuple
+from item_lists import item_list_10k
+
+ITEM_TITLES_10K = {
+    "1": "Business",
+    "1A": "Risk Factors",
+    "1B": "Unresolved Staff Comments",
+    "1C": "Cybersecurity",
+    "2": "Properties",
+    "3": "Legal Proceedings",
+    "4": "Mine Safety Disclosures",
+    "5": "Market for Registrant’s Common Equity, Related Stockholder Matters and Issuer Purchases of Equity Securities",
+    "6": "[Reserved]",
+    "7": "Management’s Discussion and Analysis of Financial Condition and Results of Operations",
+    "7A": "Quantitative and Qualitative Disclosures About Market Risk",
+    "8": "Financial Statements and Supplementary Data",
+    "9": "Changes in and Disagreements with Accountants on Accounting and Financial Disclosure",
+    "9A": "Controls and Procedures",
+    "9B": "Other Information",
+    "9C": "Disclosure Regarding Foreign Jurisdictions that Prevent Inspections",
+    "10": "Directors, Executive Officers and Corporate Governance",
+    "11": "Executive Compensation",
+    "12": "Security Ownership of Certain Beneficial Owners and Management and Related Stockholder Matters",
+    "13": "Certain Relationships and Related Transactions, and Director Independence",
+    "14": "Principal Accountant Fees and Services",
+    "15": "Exhibit and Financial Statement Schedules",
+    "16": "Form 10-K Summary",
+}
+
+ITEMS_10Q = [
+    ("PART I - FINANCIAL INFORMATION", [
+        ("1", "Financial Statements"),
+        ("2", "Management’s Discussion and Analysis of Financial Condition and Results of Operations"),
+        ("3", "Quantitative and Qualitative Disclosures About Market Risk"),
+        ("4", "Controls and Procedures"),
+    ]),
+    ("PART II - OTHER INFORMATION", [
+        ("1", "Legal Proceedings"),
+        ("1A", "Risk Factors"),
+        ("2", "Unregistered Sales of Equity Securities and Use of Proceeds"),
+        ("3", "Defaults Upon Senior Securities"),
+        ("4", "Mine Safety Disclosures"),
+        ("5", "Other Information"),
+        ("6", "Exhibits"),
+    ]),
+]
+
+ITEMS_8K = [
+    ("2.02", "Results of Operations and Financial Condition"),
+    ("5.02", "Departure of Directors or Certain Officers; Election of Directors; Appointment of Certain Officers"),
+    ("9.01", "Financial Statements and Exhibits"),
+]
+
+WORDS = (
+    "the company revenue net sales operating income fiscal year quarter segment products services customers "
+    "market risk interest rate foreign currency exchange supply chain manufacturing cash flows liquidity capital "
+    "resources tax deferred assets liabilities equity shareholders dividends repurchase program litigation "
+    "regulatory compliance cybersecurity incident management board directors compensation committee audit"
+).split()
+
+SPECIAL_CHARACTERS = ["\xa0", "’", "“", "”", "—", "–", "\x92", "\x96", "​", " "]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 24))]
+    if rng.random() < 0.3:
+        words.insert(rng.randint(0, len(words)), rng.choice(SPECIAL_CHARACTERS))
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 8)))
+
+
+def _table(rng: random.Random, inline_xbrl: bool = False) -> str:
+    rows = []
+    for _ in range(rng.randint(3, 8)):
+        values = [f"{rng.randint(100, 99999):,}" for _ in range(4)]
+        if inline_xbrl:
+            values = [
+                f'<ix:nonFraction unitRef="usd" contextRef="c-{rng.randint(1, 40)}" name="us-gaap:Revenues" '
+                f'decimals="-6" scale="6" format="ixt:num-dot-decimal">{value}</ix:nonFraction>'
+                for value in values
+            ]
+        cells = "".join(
+            f'<td style="padding:0 4pt"><span style="font-size:10pt">{value}</span></td>' for value in values
+        )
+        rows.append(f"<tr><td><span>{rng.choice(WORDS).capitalize()}</span></td>{cells}</tr>")
+    return f'<table style="width:100%">{"".join(rows)}</table>'
+
+
+def _item_header(item: str, title: str) -> str:
+    # Headers are split over several spans, with a horizontal margin span between the item number and its title
+    return (
+        f'<div><span style="font-weight:bold">Item&#160;{item}.</span>'
+        f'<span style="margin-left:36pt"></span>'
+        f'<span style="font-weight:bold">{title}</span></div>'
+    )
+
+
+def _inline_xbrl_header(rng: random.Random) -> str:
+    # The hidden header of inline XBRL documents, with a context for every reported period
+    contexts = "".join(
+        f'<xbrli:context id="c-{i}"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">0000000000'
+        f'</xbrli:identifier></xbrli:entity><xbrli:period><xbrli:startDate>20{rng.randint(10, 23)}-01-01'
+        f"</xbrli:startDate><xbrli:endDate>20{rng.randint(10, 23)}-12-31</xbrli:endDate></xbrli:period></xbrli:context>"
+        for i in range(1, 41)
+    )
+    return (
+        '<div style="display:none"><ix:header><ix:hidden>'
+        '<ix:nonNumeric name="dei:DocumentType" contextRef="c-1">10-K</ix:nonNumeric></ix:hidden>'
+        f"<ix:resources>{contexts}</ix:resources></ix:header></div>"
+    )
+
+
+def _html_document(
+        rng: random.Random,
+        form_type: str,
+        sections: List[Tuple[Optional[str], str, str]],
+        target_size: int,
+        inline_xbrl: bool = False,
+) -> str:
+    """
+    Generate an HTML report with a table of contents, the given sections and a signature.
+
+    Args:
+        rng (random.Random): The random generator.
+        form_type (str): The form type shown on the cover page.
+        sections (List[Tuple[Optional[str], str, str]]): (part header or None, item, item title) of every section.
+        target_size (int): Approximate size of the document in characters.
+        inline_xbrl (bool): Whether to tag the numbers in tables and add an inline XBRL header.
+
+    Returns:
+        str: The HTML document.
+    """
+    toc_rows = "".join(
+        f'<tr><td><a href="#i{item}">Item {item}.</a></td><td>{title}</td><td>{page}</td></tr>'
+        for page, (_, item, title) in enumerate(sections, start=3)
+    )
+    head = (
+        f"<html><head><title>{form_type}</title></head><body>"
+        + (_inline_xbrl_header(rng) if inline_xbrl else "")
+        + '<div style="text-align:center"><span>UNITED STATES SECURITIES AND EXCHANGE COMMISSION</span></div>'
+        f"<div><span>FORM {form_type}</span></div>"
+        f"<div><span>TABLE OF CONTENTS</span></div><table>{toc_rows}</table>"
+    )
+
+    budget_per_item = max(1, (target_size - len(head)) // len(sections))
+    body = []
+    page = 1
+    for part, item, title in sections:
+        if part:
+            body.append(f"<div>{part}</div>")
+        body.append(_item_header(item, title))
+        size = 0
+        while size < budget_per_item:
+            if rng.random() < 0.15:
+                block = _table(rng, inline_xbrl)
+            else:
+                block = f'<p style="margin-top:6pt"><span style="font-size:10pt">{_paragraph(rng)}</span></p>'
+            if rng.random() < 0.1:
+                # Page footer followed by a back-link to the table of contents
+                block += f'<div style="text-align:center"><span>{page}</span></div><hr/><div><a href="#toc">Table of Contents</a></div>'
+                page += 1
+            body.append(block)
+            size += len(block)
+
+    signature = (
+        "<div><span>SIGNATURES</span></div>"
+        f"<p>{_paragraph(rng)}</p><p>/s/ Jane Doe</p><p>Chief Executive Officer</p>"
+    )
+    return head + "".join(body) + signature + "</body></html>"
+
+
+def make_10k_html(target_size: int, seed: int = 0, inline_xbrl: bool = False) -> str:
+    """
+    Generate the primary HTML document of a 10-K filing.
+
+    Args:
+        target_size (int): Approximate size of the document in characters.
+        seed (int): Seed of the random generator, so the same arguments always give the same document.
+        inline_xbrl (bool): Whether to generate an inline XBRL document, as filed since 2019.
+
+    Returns:
+        str: The HTML document.
+    """
+    parts = {"1": "PART I", "5": "PART II", "10": "PART III", "15": "PART IV"}
+    sections = [
+        (parts.get(item), item, ITEM_TITLES_10K[item]) for item in item_list_10k if item != "SIGNATURE"
+    ]
+    return _html_document(random.Random(seed), "10-K", sections, target_size, inline_xbrl)
+
+
+def make_10q_html(target_size: int, seed: int = 0) -> str:
+    """
+    Generate the primary HTML document of a 10-Q filing, with items numbered again in each of its two parts.
+
+    Args:
+        target_size (int): Approximate size of the document in characters.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        str: The HTML document.
+    """
+    sections = []
+    for part, items in ITEMS_10Q:
+        for i, (item, title) in enumerate(items):
+            # The part header only precedes the first item of each part
+            sections.append((part if i == 0 else None, item, title))
+    return _html_document(random.Random(seed), "10-Q", sections, target_size)
+
+
+def make_8k_html(seed: int = 0) -> str:
+    """
+    Generate the primary HTML document of a (short) 8-K filing.
+
+    Args:
+        seed (int): Seed of the random generator.
+
+    Returns:
+        str: The HTML document.
+    """
+    sections = [(None, item, title) for item, title in ITEMS_8K]
+    return _html_document(random.Random(seed), "8-K", sections, 12_000)
+
+
+def make_10k_txt(target_size: int, seed: int = 0) -> str:
+    """
+    Generate a plain text 10-K405 as filed before 2001: upper case headers, <PAGE> breaks with centered page numbers,
+    fixed-width tables and items 1 to 14 only.
+
+    Args:
+        target_size (int): Approximate size of the document in characters.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        str: The document text.
+    """
+    rng = random.Random(seed)
+    items = [str(i) for i in range(1, 15)]
+    parts = {"1": "PART I", "5": "PART II", "10": "PART III", "14": "PART IV"}
+
+    toc = "\n".join(f"Item {item}.    {ITEM_TITLES_10K[item]}{'.' * 8}{page:>4}" for page, item in enumerate(items, start=2))
+    head = (
+        "                       SECURITIES AND EXCHANGE COMMISSION\n"
+        "                             WASHINGTON, D.C. 20549\n\n"
+        "                                   FORM 10-K\n\n"
+        f"                               TABLE OF CONTENTS\n\n{toc}\n\n<PAGE>\n"
+    )
+
+    budget_per_item = max(1, (target_size - len(head)) // len(items))
+    body = []
+    page = 2
+    for item in items:
+        if item in parts:
+            body.append(f"\n                                     {parts[item]}\n")
+        body.append(f"\nITEM {item}.  {ITEM_TITLES_10K[item].upper()}\n\n")
+        size = 0
+        while size < budget_per_item:
+            if rng.random() < 0.15:
+                block = "\n".join(
+                    f"    {rng.choice(WORDS).capitalize():<30}" + "".join(f"{rng.randint(100, 99999):>12,}" for _ in range(3))
+                    for _ in range(rng.randint(3, 8))
+                ) + "\n\n"
+            else:
+                # Lines wrapped at 78 characters, as in the original typewriter-style filings
+                paragraph = _paragraph(rng)
+                lines, line = [], ""
+                for word in paragraph.split(" "):
+                    if len(line) + len(word) > 78:
+                        lines.append(line)
+                        line = ""
+                    line = f"{line} {word}" if line else word
+                block = "\n".join(lines + [line]) + "\n\n"
+            if rng.random() < 0.1:
+                block += f"                                      {page}\n<PAGE>\n"
+                page += 1
+            body.append(block)
+            size += len(block)
+
+    signature = f"\n                                   SIGNATURES\n\n{_paragraph(rng)}\n\n    /s/ John Doe\n    President\n"
+    return head + "".join(body) + signature
+
+
+def make_full_submission(document: str, form_type: str = "10-K", file_name: str = "primary.htm") -> str:
+    """
+    Wrap a primary document into an EDGAR full submission text file with <DOCUMENT> tags and an exhibit.
+
+    Args:
+        document (str): The primary document.
+        form_type (str): The form type of the primary document.
+        file_name (str): The file name of the primary document.
+
+    Returns:
+        str: The submission text.
+    """
+    return (
+        "<SEC-DOCUMENT>0000000000-24-000001.txt : 20240101\n"
+        f"<SEC-HEADER>\nCONFORMED SUBMISSION TYPE:\t{form_type}\n</SEC-HEADER>\n"
+        f"<DOCUMENT>\n<TYPE>{form_type}\n<SEQUENCE>1\n<FILENAME>{file_name}\n<TEXT>\n{document}\n</TEXT>\n</DOCUMENT>\n"
+        "<DOCUMENT>\n<TYPE>EX-21.1\n<SEQUENCE>2\n<FILENAME>ex21.htm\n<TEXT>\n"
+        "<html><body><p>Subsidiaries of the registrant</p></body></html>\n</TEXT>\n</DOCUMENT>\n"
+        "</SEC-DOCUMENT>\n"
+    )
+
+
+# (file name, form type, filing date, generator) of the benchmark corpus; sizes are in MB at scale 1
+CORPUS = [
+    ("10k_small.txt", "10-K", "2023-11-03", lambda scale: make_full_submission(make_10k_html(int(0.5 * 2 ** 20 * scale), seed=1))),
+    ("10k_large_ixbrl.txt", "10-K", "2024-02-21", lambda scale: make_full_submission(make_10k_html(int(8 * 2 ** 20 * scale), seed=2, inline_xbrl=True))),
+    ("10q.txt", "10-Q", "2024-05-02", lambda scale: make_full_submission(make_10q_html(int(2 ** 20 * scale), seed=3), "10-Q")),
+    ("8k.txt", "8-K", "2024-01-25", lambda scale: make_full_submission(make_8k_html(seed=4), "8-K")),
+    ("10k405_1998.txt", "10-K", "1998-03-30", lambda scale: make_full_submission(make_10k_txt(int(2 ** 20 * scale), seed=5), "10-K405", "0000000000-98-000001.txt")),
+]
+
+
+def build_corpus(directory: str, scale: float = 1.0) -> List[Dict[str, str]]:
+    """
+    Write the synthetic benchmark corpus and its manifest.json to a directory. The files are only generated if they
+    do not exist yet, so the corpus stays frozen between runs.
+
+    Args:
+        directory (str): Target directory.
+        scale (float): Factor applied to the size of every filing except the 8-K.
+
+    Returns:
+        List[Dict[str, str]]: The manifest entries (file, type, date).
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = []
+    for file_name, form_type, date, generate in CORPUS:
+        path = os.path.join(directory, file_name)
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(generate(scale))
+        manifest.append({"file": file_name, "type": form_type, "date": date})
+
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -51,6 +51,25 @@ FRONTEND_URL = os.getenv("FRONTEND_URL")
 if not FRONTEND_URL:
     raise RuntimeError("FRONTEND_URL environment variable is not set.")
 
+# On-disk cache for immutable EDGAR archive documents (see sec_cache.py)
+SEC_CACHE_DIR = os.getenv("SEC_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sec_cache")
+SEC_CACHE_MAX_BYTES = int(os.getenv("SEC_CACHE_MAX_BYTES") or 2 * 1024 ** 3)  # 2 GB of compressed documents
+
+# SEC allows 10 requests per second per user agent: https://www.sec.gov/os/accessing-edgar-data
+SEC_MAX_REQUESTS_PER_SECOND = float(os.getenv("SEC_MAX_REQUESTS_PER_SECOND") or 10)
+# Setting this makes every process on the host (API workers, cron scripts) share one allowance (see sec_rate.py)
+SEC_RATE_LOCK_FILE = os.getenv("SEC_RATE_LOCK_FILE") or None
+
+# Number of extraction processes; every one of them can keep a CPU core busy (see extraction_pool.py)
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS") or os.cpu_count() or 1)
+# Maximum number of extractions running or waiting for a worker; further requests are rejected right away
+EXTRACTION_QUEUE_DEPTH = int(os.getenv("EXTRACTION_QUEUE_DEPTH") or 4 * EXTRACTION_WORKERS)
+# Seconds a single extraction may run before its worker is killed
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT") or 120)
+
+# Number of jobs running at the same time; the sync jobs share the SEC rate limit, so more rarely helps (see jobs.py)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS") or 1)
+
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 30  # Refresh tokens last 30 days
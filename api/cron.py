@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Request, Depends, Query, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
 from deps import verify_cron_token, limiter
-from sec import update_tickers_data, update_filings_data
+from sec import update_tickers_data, update_filings_data, update_filings_daily
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from db import get_db
-from models import User
+from models import Job, User
 from email_service import EmailService
 from auth import create_verification_token
+from jobs import job_runner, job_to_dict
 import asyncio
 
 router = APIRouter()
@@ -19,7 +20,8 @@ def update_tickers(
         request: Request,
         testing: bool = Query(False),
         auth: HTTPAuthorizationCredentials = Depends(verify_cron_token)):
-    return update_tickers_data(testing)
+    job_id = job_runner.submit("update-tickers", update_tickers_data, testing=testing)
+    return {"status": "queued", "job_id": job_id}
 
 
 @router.post("/update-filings")
@@ -28,7 +30,31 @@ def update_filings(
         request: Request,
         testing: bool = Query(False),
         auth: HTTPAuthorizationCredentials = Depends(verify_cron_token)):
-    return update_filings_data(testing)
+    job_id = job_runner.submit("update-filings", update_filings_data, testing=testing)
+    return {"status": "queued", "job_id": job_id}
+
+
+@router.post("/update-filings-daily")
+@limiter.limit("1/hour")
+def update_filings_incremental(
+        request: Request,
+        testing: bool = Query(False),
+        auth: HTTPAuthorizationCredentials = Depends(verify_cron_token)):
+    """Ingest the filings of the days since the last run from EDGAR's daily indexes."""
+    job_id = job_runner.submit("update-filings-daily", update_filings_daily, testing=testing)
+    return {"status": "queued", "job_id": job_id}
+
+
+@router.get("/jobs/{job_id}")
+def get_job(
+        job_id: int,
+        db: Session = Depends(get_db),
+        auth: HTTPAuthorizationCredentials = Depends(verify_cron_token)):
+    """Status, progress, result and duration of a job started by one of the endpoints above."""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
 
 
 @router.post("/resend-verification-emails")
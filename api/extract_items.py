@@ -1,7 +1,9 @@
 from typing import Any, Dict, List, Optional, Tuple
 from item_lists import item_list_8k, item_list_8k_obsolete, item_list_10k, item_list_10q, item_list_other
-from bs4 import BeautifulSoup
+from lxml import etree
 from html.parser import HTMLParser
+from functools import lru_cache
+from bisect import bisect_left, bisect_right
 import pandas as pd
 import re
 
@@ -31,6 +33,352 @@ roman_numeral_map = {
     "20": "XX",
 }
 
+# Single-character substitutions done by ExtractItems.clean_text, applied in one pass over the text.
+# Characters that were substituted with themselves (e.g. \u2018 -> ‘) are left out.
+special_characters_map = {
+    "\xa0": " ",
+    "\u200b": " ",
+    "\x91": "‘",
+    "\x92": "’",
+    "\x93": "“",
+    "\x94": "”",
+    "\x95": "•",
+    "\x96": "-",
+    "\x97": "-",
+    "\x98": "˜",
+    "\x99": "™",
+    "\u2010": "-",
+    "\u2011": "-",
+    "\u2012": "-",
+    "\u2013": "-",
+    "\u2014": "-",
+    "\u2015": "-",
+    "\u2009": " ",
+}
+# A character class scan is much faster than str.translate here: translate falls back to a per-character
+# dict lookup for non-ASCII tables, while the regex only calls back for the few characters that need replacing
+special_characters_pattern = re.compile(f"[{''.join(special_characters_map)}]")
+
+horizontal_whitespace_pattern = re.compile(r"[^\S\r\n]")
+
+# Section headers broken up by whitespace (P A R T, I T E M, S I G N A T U R E).
+# Group 2 is the keyword whose inner whitespace is removed, the lookaheads require what has to follow it.
+# A match never spans more than one line, so the three keywords can be fixed in a single pass.
+broken_section_header_pattern = re.compile(
+    r"(\n[^\S\r\n]*)("
+    r"P[^\S\r\n]*A[^\S\r\n]*R[^\S\r\n]*T(?=[^\S\r\n]+(?:\d{1,2}|[IV]{1,2}))"
+    r"|I[^\S\r\n]*T[^\S\r\n]*E[^\S\r\n]*M(?=[^\S\r\n]+\d{1,2})"
+    r"|S[^\S\r\n]*I[^\S\r\n]*G[^\S\r\n]*N[^\S\r\n]*A[^\S\r\n]*T[^\S\r\n]*U[^\S\r\n]*R[^\S\r\n]*E[^\S\r\n]*"
+    r"(?:S|\([^\S\r\n]*s[^\S\r\n]*\))?(?=[^\S\r\n])"
+    r")",
+    re.IGNORECASE,
+)
+# Same as (ITEM|PART)(...), but starting with a character class lets the regex engine skip ahead quickly
+item_part_separator_pattern = re.compile(
+    r"([IP](?:(?<=[Ii])TEM|(?<=[Pp])ART))(\s+\d{1,2}[AB]?)([\-•])", re.IGNORECASE
+)
+unnecessary_headers_pattern = re.compile(
+    r"\n[^\S\r\n]*"
+    r"(TABLE\s+OF\s+CONTENTS|INDEX\s+TO\s+FINANCIAL\s+STATEMENTS|BACK\s+TO\s+CONTENTS|QUICKLINKS)"
+    r"[^\S\r\n]*\n",
+    re.IGNORECASE | re.MULTILINE,
+)
+dashed_page_number_pattern = re.compile(r"\n[^\S\r\n]*[-‒–—]*\d+[-‒–—]*[^\S\r\n]*\n", re.IGNORECASE | re.MULTILINE)
+page_number_pattern = re.compile(r"\n[^\S\r\n]*\d+[^\S\r\n]*\n", re.IGNORECASE | re.MULTILINE)
+financial_page_number_pattern = re.compile(r"[\n\s]F[-‒–—]*\d+", re.IGNORECASE | re.MULTILINE)
+page_label_pattern = re.compile(r"\n[^\S\r\n]*Page\s[\d*]+[^\S\r\n]*\n", re.IGNORECASE | re.MULTILINE)
+
+# Patterns used to split a filing into its documents
+pdf_pattern = re.compile(r"<PDF>.*?</PDF>", regex_flags)
+document_pattern = re.compile("<DOCUMENT>.*?</DOCUMENT>", regex_flags)
+document_type_pattern = re.compile(r"\n[^\S\r\n]*<TYPE>(.*?)\n", regex_flags)
+
+# Patterns used by ExtractItems.handle_spans for plain text documents
+horizontal_margin_pattern = re.compile(
+    r'<span[^>]*style="[^"]*(margin-left|margin-right):\s*[\d.]+pt[^"]*"[^>]*>.*?</span>',
+    re.IGNORECASE,
+)
+vertical_margin_pattern = re.compile(
+    r'<span[^>]*style="[^"]*(margin-top|margin-bottom):\s*[\d.]+pt[^"]*"[^>]*>.*?</span>',
+    re.IGNORECASE,
+)
+
+# Patterns used by ExtractItems.strip_html
+block_closing_tag_pattern = re.compile(r"(<\s*/\s*(div|tr|p|li|)\s*>)")
+line_break_tag_pattern = re.compile(r"(<br\s*>|<br\s*/>)")
+cell_closing_tag_pattern = re.compile(r"(<\s*/\s*(th|td)\s*>)")
+
+# Patterns used by ExtractItems.remove_multiple_lines
+multiple_lines_pattern = re.compile(r"(( )*\n( )*){2,}")
+newline_pattern = re.compile(r"\n")
+newline_token_pattern = re.compile(r"(#NEWLINE)+")
+multiple_spaces_pattern = re.compile(r"[ ]{2,}")
+
+
+@lru_cache(maxsize=None)
+def adjust_item_pattern(item_index: str) -> str:
+    """
+    Adjust the item_pattern for matching in the document text depending on the item index. This is necessary on a case by case basis.
+    The result only depends on the item index, so it is computed once per item and memoized.
+
+    Args:
+        item_index (str): The item index to adjust the pattern for.
+                          For 10-Q preprocessing, this can also be part_1 or part_2.
+
+    Returns:
+        item_index_pattern (str): The adjusted item pattern
+    """
+    # For 10-Q reports, we have two parts of items: part1 and part2
+    if "part" in item_index:
+        if "__" not in item_index:
+            # We are searching for the general part, not a specific item (e.g. PART I)
+            item_index_number = item_index.split("_")[1]
+            item_index_pattern = rf"PART\s*(?:{roman_numeral_map[item_index_number]}|{item_index_number})"
+            return item_index_pattern
+        else:
+            # We are working with an item, but we just consider the string after the part as the item_index
+            item_index = item_index.split("__")[1]
+
+    # Create a regex pattern from the item index
+    item_index_pattern = item_index
+
+    # Modify the item index format for matching in the text
+    if item_index == "9A":
+        item_index_pattern = item_index_pattern.replace(
+            "A", r"[^\S\r\n]*A(?:\(T\))?"
+        )  # Regex pattern for item index "9A"
+    elif item_index == "SIGNATURE":
+        # Quit here so the A in SIGNATURE is not changed
+        pass
+    elif "A" in item_index:
+        item_index_pattern = item_index_pattern.replace(
+            "A", r"[^\S\r\n]*A"
+        )  # Regex pattern for other "A" item indexes
+    elif "B" in item_index:
+        item_index_pattern = item_index_pattern.replace(
+            "B", r"[^\S\r\n]*B"
+        )  # Regex pattern for "B" item indexes
+    elif "C" in item_index:
+        item_index_pattern = item_index_pattern.replace(
+            "C", r"[^\S\r\n]*C"
+        )  # Regex pattern for "C" item indexes
+
+    # If the item is SIGNATURE, we don't want to look for ITEM
+    if item_index == "SIGNATURE":
+        # Some reports have SIGNATURES or Signature(s) instead of SIGNATURE
+        item_index_pattern = rf"{item_index}(s|\(s\))?"
+    else:
+        if "." in item_index:
+            # We need to escape the '.', otherwise it will be treated as a special character - for 8Ks
+            item_index = item_index.replace(".", r"\.")
+        if item_index in roman_numeral_map:
+            # Rarely, reports use roman numerals for the item indexes. For 8-K, we assume this does not occur (due to their format - e.g. 5.01)
+            item_index = f"(?:{roman_numeral_map[item_index]}|{item_index})"
+        item_index_pattern = rf"ITEMS?\s*{item_index}"
+
+    return item_index_pattern
+
+
+@lru_cache(maxsize=None)
+def section_header_regex(item_index: str, case_sensitive: bool, closing_paren: bool) -> re.Pattern:
+    """
+    Compiled pattern matching only the header part of item_section_regex, either the one of the item itself
+    (whose trailing character class also allows ")") or the one of the next item.
+    """
+    flags = re.DOTALL if case_sensitive else re.IGNORECASE | re.DOTALL
+    trailing = r"[.*~\-:\s\()]" if closing_paren else r"[.*~\-:\s\(]"
+    return re.compile(rf"\n[^\S\r\n]*{adjust_item_pattern(item_index)}{trailing}", flags)
+
+
+@lru_cache(maxsize=None)
+def item_header_regex(item_index: str) -> re.Pattern:
+    """
+    Compiled pattern matching the header of an item/section at the start of a line, e.g. "Item 1A."
+    """
+    return section_header_regex(item_index, False, False)
+
+
+@lru_cache(maxsize=None)
+def item_section_regex(item_index: str, next_item_index: str, case_sensitive: bool) -> re.Pattern:
+    """
+    Compiled pattern matching the text from the header of an item/section up to the header of the next one.
+    Group 1 is the header of the next item/section.
+    """
+    flags = re.DOTALL if case_sensitive else re.IGNORECASE | re.DOTALL
+    return re.compile(
+        rf"\n[^\S\r\n]*{adjust_item_pattern(item_index)}[.*~\-:\s\()].+?"
+        rf"(\n[^\S\r\n]*{adjust_item_pattern(next_item_index)}[.*~\-:\s\(])",
+        flags,
+    )
+
+
+@lru_cache(maxsize=None)
+def last_item_regex(item_index: str) -> re.Pattern:
+    """
+    Compiled pattern matching the header of an item/section that runs until the end of the text.
+    """
+    return re.compile(rf"\n[^\S\r\n]*{adjust_item_pattern(item_index)}[.\-:\s].+?", regex_flags)
+
+
+# Every item/section pattern starts with a line break followed by one of these keywords
+header_candidate_pattern = re.compile(r"\n[^\S\r\n]*(?=ITEM|PART|SIGNATURE)", re.IGNORECASE)
+
+
+class SectionIndex:
+    """
+    Index of the item/section headers of one report text, used by ExtractItems.parse_item.
+
+    The text is scanned once for all lines that could start a header. Each header pattern is then only tried at
+    those positions, and the matches of item_section_regex are derived from the sorted header positions with a
+    binary search instead of scanning the rest of the document with a lazy ".+?" for every header match.
+    The results are the same as those of running the regexes with finditer.
+
+    Attributes:
+        text (str): The indexed report text.
+        candidates (List[int]): Sorted start positions of all lines starting with ITEM, PART or SIGNATURE.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.candidates = [match.start() for match in header_candidate_pattern.finditer(text)]
+        self._headers: Dict[Tuple[str, bool, bool], Tuple[List[int], List[int]]] = {}
+        self._sections: Dict[Tuple[str, str, bool, int], Optional[Tuple[int, int, int]]] = {}
+
+    def headers(self, item_index: str, case_sensitive: bool, closing_paren: bool) -> Tuple[List[int], List[int]]:
+        """
+        Return the start and end positions of every position a header pattern matches at (overlapping included).
+
+        Args:
+            item_index (str): The item index of the header.
+            case_sensitive (bool): Whether the header has to match case-sensitively.
+            closing_paren (bool): Whether the trailing character may be ")", see section_header_regex.
+
+        Returns:
+            Tuple[List[int], List[int]]: The sorted start positions and the matching end positions.
+        """
+        key = (item_index, case_sensitive, closing_paren)
+        if key not in self._headers:
+            pattern = section_header_regex(item_index, case_sensitive, closing_paren)
+            starts, ends = [], []
+            for candidate in self.candidates:
+                match = pattern.match(self.text, candidate)
+                if match:
+                    starts.append(candidate)
+                    ends.append(match.end())
+            self._headers[key] = (starts, ends)
+        return self._headers[key]
+
+    def header_matches(self, item_index: str) -> List[int]:
+        """
+        Return the start positions of the matches of item_header_regex(item_index).finditer(text).
+        """
+        starts, ends = self.headers(item_index, False, False)
+        matches = []
+        last_end = 0
+        for start, end in zip(starts, ends):
+            # finditer does not return overlapping matches
+            if start >= last_end:
+                matches.append(start)
+                last_end = end
+        return matches
+
+    def sections(self, item_index: str, next_item_index: str, case_sensitive: bool, offset: int) -> List[Tuple[int, int, int]]:
+        """
+        Return the matches of item_section_regex(item_index, next_item_index, case_sensitive).finditer(text[offset:]).
+
+        Returns:
+            List[Tuple[int, int, int]]: The absolute start of each match, the start of its group 1 (the header
+                                        of the next item) and its end.
+        """
+        sections = []
+        pos = offset
+        while True:
+            section = self._next_section(item_index, next_item_index, case_sensitive, pos)
+            if section is None:
+                return sections
+            sections.append(section)
+            pos = section[2]
+
+    def _next_section(self, item_index: str, next_item_index: str, case_sensitive: bool, pos: int) -> Optional[Tuple[int, int, int]]:
+        """
+        Return the first match of item_section_regex(item_index, next_item_index, case_sensitive) at or after pos.
+        """
+        key = (item_index, next_item_index, case_sensitive, pos)
+        if key in self._sections:
+            return self._sections[key]
+
+        starts, ends = self.headers(item_index, case_sensitive, True)
+        next_starts, next_ends = self.headers(next_item_index, case_sensitive, False)
+
+        section = None
+        for i in range(bisect_left(starts, pos), len(starts)):
+            start, end = starts[i], ends[i]
+            # ".+?" takes at least one character and stops at the first header of the next item
+            j = bisect_left(next_starts, end + 1)
+            if j < len(next_starts):
+                section = (start, next_starts[j], next_ends[j])
+                break
+            if bisect_right(next_starts, start) == len(next_starts):
+                # There is no header of the next item after this point, so no header further down can match either
+                break
+            # The only next-item header left lies within this header (e.g. a line break matched by "\s*"),
+            # which the regex can still reach by backtracking - let it decide
+            match = item_section_regex(item_index, next_item_index, case_sensitive).search(self.text, start)
+            if match:
+                section = (match.start(), match.regs[1][0], match.end())
+            break
+
+        self._sections[key] = section
+        return section
+
+
+def get_items_list(filing_type: str, filing_date: str) -> List[str]:
+    """
+    Returns the list of items of a filing type, in the order they appear in a filing.
+
+    Args:
+        filing_type (str): The form type, e.g. 10-K.
+        filing_date (str): The filing date, 8-K items were renamed in 2004.
+
+    Returns:
+        List[str]: The item indexes, e.g. ["1", "1A", ...] for 10-K or ["part_1__1", ...] for 10-Q.
+    """
+    if filing_type == "10-K":
+        return item_list_10k
+    if filing_type == "8-K":
+        # Prior to August 23, 2004, the 8-K items were named differently
+        obsolete_cutoff_date_8k = pd.to_datetime("2004-08-23")
+        if pd.to_datetime(filing_date) > obsolete_cutoff_date_8k:
+            return item_list_8k
+        return item_list_8k_obsolete
+    if filing_type == "10-Q":
+        return item_list_10q
+# don't throw exception, figure out how to structure unsupported documents. Maybe return a {content:cleaned_html}
+#             raise Exception(
+#                 f"Unsupported filing type: {filing_type}. No items_list defined."
+#             )
+    return item_list_other
+
+
+def item_json_key(item_index: str) -> str:
+    """
+    Returns the key of an item in the JSON content, e.g. item_1A for 10-K item 1A or part_2_item_1A for 10-Q item
+    part_2__1A.
+
+    Args:
+        item_index (str): The item index as used in the item lists.
+
+    Returns:
+        str: The JSON key.
+    """
+    if item_index == "SIGNATURE":
+        return item_index
+    if "part" in item_index:
+        # special naming convention for 10-Qs
+        return item_index.split("__")[0] + "_item_" + item_index.split("__")[1]
+    return f"item_{item_index}"
+
+
 class ExtractItems:
     def __init__(
             self,
@@ -45,6 +393,7 @@ class ExtractItems:
         self.items_list = []
         self.include_signature = include_signature
         self.json_content = None
+        self.section_index = None
 
         # Determine which items to extract based on the filing type and the items provided by the user
         self.determine_items_to_extract()
@@ -58,24 +407,7 @@ class ExtractItems:
 
         Sets the items_to_extract attribute based on the filing type and the items provided by the user.
         """
-        if self.filing_metadata["Type"] == "10-K":
-            items_list = item_list_10k
-        elif self.filing_metadata["Type"] == "8-K":
-            # Prior to August 23, 2004, the 8-K items were named differently
-            obsolete_cutoff_date_8k = pd.to_datetime("2004-08-23")
-            if pd.to_datetime(self.filing_metadata["Date"]) > obsolete_cutoff_date_8k:
-                items_list = item_list_8k
-            else:
-                items_list = item_list_8k_obsolete
-        elif self.filing_metadata["Type"] == "10-Q":
-            items_list = item_list_10q
-        else:
-            items_list = item_list_other
-# don't throw exception, figure out how to structure unsupported documents. Maybe return a {content:cleaned_html}
-#             raise Exception(
-#                 f"Unsupported filing type: {self.filing_metadata['Type']}. No items_list defined."
-#             )
-
+        items_list = get_items_list(self.filing_metadata["Type"], self.filing_metadata["Date"])
         self.items_list = items_list
 
         # Check which items the user provided and which items are available for the filing type
@@ -92,60 +424,42 @@ class ExtractItems:
         else:
             self.items_to_extract = items_list
 
-    def extract_items(self) -> None:
-        """
-        Extracts all items/sections for a file
+    def get_items_to_parse(self) -> List[str]:
         """
-        content = self.filing_html
+        Returns the items that have to be parsed to extract items_to_extract.
 
-        # Remove all embedded pdfs that might be seen in few old txt annual reports
-        content = re.sub(r"<PDF>.*?</PDF>", "", content, flags=regex_flags)
-
-        # Find all <DOCUMENT> tags within the content
-        documents = re.findall("<DOCUMENT>.*?</DOCUMENT>", content, flags=regex_flags)
+        An item section is only accepted after the end of the previous item's section, so every item before a
+        requested one has to be parsed as well, but only within the same 10-Q part (positions are reset per part).
+        The items after the last requested one are skipped; they are still used to find where a section ends.
 
-        # Initialize variables
-        doc_report = None
-        found, is_html = False, False
+        Returns:
+            List[str]: The items to parse, in the order of items_list.
+        """
+        def part_of(item_index: str) -> str:
+            return item_index.split("__")[0] if "part" in item_index else ""
 
-        # Find the document
-        for doc in documents:
-            # Find the <TYPE> tag within each <DOCUMENT> tag to identify the type of document
-            doc_type = re.search(r"\n[^\S\r\n]*<TYPE>(.*?)\n", doc, flags=regex_flags)
-            doc_type = doc_type.group(1) if doc_type else None
+        last_requested = {}
+        for i, item_index in enumerate(self.items_list):
+            if item_index in self.items_to_extract:
+                last_requested[part_of(item_index)] = i
 
-            # Check if the document is an allowed document type
-            if doc_type.startswith(("10", "8")):
-                # For 10-K, 10-Q and 8-K filings. We only check for the number in case it is e.g. '10K' instead of '10-K'
-                # Check if the document is HTML or plain text
-                doc_report = BeautifulSoup(doc, "lxml")
-                is_html = (True if doc_report.find("td") else False) and (
-                    True if doc_report.find("tr") else False
-                )
-                if not is_html:
-                    doc_report = doc
-                found = True
-                # break
+        return [
+            item_index for i, item_index in enumerate(self.items_list)
+            if i <= last_requested.get(part_of(item_index), -1)
+        ]
 
-        if not found:
-            if documents:
-                print(
-                    f'\nCould not find documents for {self.filing_metadata["filename"]}'
-                )
-            # If no document is found, parse the entire content as HTML or plain text
-            doc_report = BeautifulSoup(content, "lxml")
-            is_html = (True if doc_report.find("td") else False) and (
-                True if doc_report.find("tr") else False
-            )
-            if not is_html:
-                doc_report = content
-# FIX filename METADATA to refer to the downloaded file name...?
-        # Check if the document is plain text without <DOCUMENT> tags (e.g., old TXT format)
-        if self.filing_metadata["filename"].endswith("txt") and not documents:
-            print(f'\nNo <DOCUMENT> tag for {self.filing_metadata["filename"]}')
+    def extract_items(self) -> None:
+        """
+        Extracts all items/sections for a file
+        """
+        doc_report = self.get_document(self.filing_html)
 
-        # Detect span elements and handle them depending on span type
-        doc_report = self.handle_spans(doc_report, is_html=is_html)
+        # Check if the document is HTML, handle its spans and strip its tags in a single parse
+        text = HtmlTextExtractor().extract(doc_report)
+        if text is None:
+            # Plain text: detect span elements and handle them depending on span type
+            doc_report = self.handle_spans(doc_report, is_html=False)
+            text = ExtractItems.strip_html(doc_report)
 
         # Prepare the JSON content with filing metadata
         self.json_content = {
@@ -164,8 +478,7 @@ class ExtractItems:
             "filename": self.filing_metadata["filename"],
         }
 
-        # Extract the text from the document and clean it
-        text = ExtractItems.strip_html(str(doc_report))
+        # Clean the text extracted from the document
         text = ExtractItems.clean_text(text)
 
         if self.filing_metadata["Type"] not in ["10-K", "10-Q", "8-K"]:
@@ -176,9 +489,14 @@ class ExtractItems:
         if self.filing_metadata["Type"] == "10-Q":
             part_texts = self.get_10q_parts(text)
 
+        items_to_parse = self.get_items_to_parse()
+
         positions = []
         all_items_null = True
         for i, item_index in enumerate(self.items_list):
+            if item_index not in items_to_parse:
+                continue
+
             next_item_list = self.items_list[i + 1 :]
 
             # If the text is divided in parts, we just take the text from the corresponding part
@@ -217,24 +535,61 @@ class ExtractItems:
                     all_items_null = False
 
                 # Add the item section to the JSON content
-                if item_index == "SIGNATURE":
-                    if self.include_signature:
-                        self.json_content[f"{item_index}"] = item_section
-                else:
-                    if "part" in item_index:
-                        # special naming convention for 10-Qs
-                        self.json_content[
-                            item_index.split("__")[0]
-                            + "_item_"
-                            + item_index.split("__")[1]
-                            ] = item_section
-                    else:
-                        self.json_content[f"item_{item_index}"] = item_section
+                if item_index != "SIGNATURE" or self.include_signature:
+                    self.json_content[item_json_key(item_index)] = item_section
 
         if all_items_null:
             print(f"\nCould not extract any item for {self.filing_metadata['filename']}")
             return None
 
+    def get_document(self, content: str) -> str:
+        """
+        Returns the document of the filing to extract the items from: the (last) 10-K, 10-Q or 8-K <DOCUMENT> of the
+        submission, or the whole content if there is no such document.
+
+        Args:
+            content (str): The full submission text of the filing.
+
+        Returns:
+            str: The document, either HTML or plain text.
+        """
+        # Remove all embedded pdfs that might be seen in few old txt annual reports
+        content = pdf_pattern.sub("", content)
+
+        # Find all <DOCUMENT> tags within the content
+        documents = document_pattern.findall(content)
+
+        # Initialize variables
+        doc_report = None
+        found = False
+
+        # Find the document
+        for doc in documents:
+            # Find the <TYPE> tag within each <DOCUMENT> tag to identify the type of document
+            doc_type = document_type_pattern.search(doc)
+            doc_type = doc_type.group(1) if doc_type else None
+
+            # Check if the document is an allowed document type
+            if doc_type.startswith(("10", "8")):
+                # For 10-K, 10-Q and 8-K filings. We only check for the number in case it is e.g. '10K' instead of '10-K'
+                doc_report = doc
+                found = True
+                # break
+
+        if not found:
+            if documents:
+                print(
+                    f'\nCould not find documents for {self.filing_metadata["filename"]}'
+                )
+            # If no document is found, parse the entire content as HTML or plain text
+            doc_report = content
+# FIX filename METADATA to refer to the downloaded file name...?
+        # Check if the document is plain text without <DOCUMENT> tags (e.g., old TXT format)
+        if self.filing_metadata["filename"].endswith("txt") and not documents:
+            print(f'\nNo <DOCUMENT> tag for {self.filing_metadata["filename"]}')
+
+        return doc_report
+
     def handle_spans(self, doc: str, is_html) -> str:
         """The documents can contain different span types - some are used for formatting, others for margins.
         Sometimes these spans even appear in the middle of words. We need to handle them depending on their type.
@@ -274,21 +629,11 @@ class ExtractItems:
                     span.replace_with("\n")
 
         else:
-            # Define regex patterns for horizontal and vertical margins
-            horizontal_margin_pattern = re.compile(
-                r'<span[^>]*style="[^"]*(margin-left|margin-right):\s*[\d.]+pt[^"]*"[^>]*>.*?</span>',
-                re.IGNORECASE,
-            )
-            vertical_margin_pattern = re.compile(
-                r'<span[^>]*style="[^"]*(margin-top|margin-bottom):\s*[\d.]+pt[^"]*"[^>]*>.*?</span>',
-                re.IGNORECASE,
-            )
-
             # Replace horizontal margins with a single whitespace
-            doc = re.sub(horizontal_margin_pattern, " ", doc)
+            doc = horizontal_margin_pattern.sub(" ", doc)
 
             # Replace vertical margins with a single newline
-            doc = re.sub(vertical_margin_pattern, "\n", doc)
+            doc = vertical_margin_pattern.sub("\n", doc)
 
         return doc
 
@@ -304,11 +649,11 @@ class ExtractItems:
             str: The stripped HTML content.
         """
         # Replace closing tags of certain elements with two newline characters
-        html_content = re.sub(r"(<\s*/\s*(div|tr|p|li|)\s*>)", r"\1\n\n", html_content)
+        html_content = block_closing_tag_pattern.sub(r"\1\n\n", html_content)
         # Replace <br> tags with two newline characters
-        html_content = re.sub(r"(<br\s*>|<br\s*/>)", r"\1\n\n", html_content)
+        html_content = line_break_tag_pattern.sub(r"\1\n\n", html_content)
         # Replace closing tags of certain elements with a space
-        html_content = re.sub(r"(<\s*/\s*(th|td)\s*>)", r" \1 ", html_content)
+        html_content = cell_closing_tag_pattern.sub(r" \1 ", html_content)
         # Use HtmlStripper to strip remaining HTML tags
         html_content = HtmlStripper().strip_tags(html_content)
 
@@ -325,82 +670,25 @@ class ExtractItems:
         Returns:
             str: The normalized, clean text.
         """
-        # Replace special characters with their corresponding substitutions
-        text = re.sub(r"[\xa0]", " ", text)
-        text = re.sub(r"[\u200b]", " ", text)
-        text = re.sub(r"[\x91]", "‘", text)
-        text = re.sub(r"[\x92]", "’", text)
-        text = re.sub(r"[\x93]", "“", text)
-        text = re.sub(r"[\x94]", "”", text)
-        text = re.sub(r"[\x95]", "•", text)
-        text = re.sub(r"[\x96]", "-", text)
-        text = re.sub(r"[\x97]", "-", text)
-        text = re.sub(r"[\x98]", "˜", text)
-        text = re.sub(r"[\x99]", "™", text)
-        text = re.sub(r"[\u2010\u2011\u2012\u2013\u2014\u2015]", "-", text)
-        text = re.sub(r"[\u2018]", "‘", text)
-        text = re.sub(r"[\u2019]", "’", text)
-        text = re.sub(r"[\u2009]", " ", text)
-        text = re.sub(r"[\u00ae]", "®", text)
-        text = re.sub(r"[\u201c]", "“", text)
-        text = re.sub(r"[\u201d]", "”", text)
-
-        def remove_whitespace(match):
-            ws = r"[^\S\r\n]"
-            return f'{match[1]}{re.sub(ws, r"", match[2])}{match[3]}{match[4]}'
-
-        def remove_whitespace_signature(match):
-            ws = r"[^\S\r\n]"
-            return f'{match[1]}{re.sub(ws, r"", match[2])}{match[4]}{match[5]}'
-
-        # Fix broken section headers (PART, ITEM, SIGNATURE)
-        text = re.sub(
-            r"(\n[^\S\r\n]*)(P[^\S\r\n]*A[^\S\r\n]*R[^\S\r\n]*T)([^\S\r\n]+)((\d{1,2}|[IV]{1,2})[AB]?)",
-            remove_whitespace,
-            text,
-            flags=re.IGNORECASE,
-        )
-        text = re.sub(
-            r"(\n[^\S\r\n]*)(I[^\S\r\n]*T[^\S\r\n]*E[^\S\r\n]*M)([^\S\r\n]+)(\d{1,2}[AB]?)",
-            remove_whitespace,
-            text,
-            flags=re.IGNORECASE,
-        )
-        text = re.sub(
-            r"(\n[^\S\r\n]*)(S[^\S\r\n]*I[^\S\r\n]*G[^\S\r\n]*N[^\S\r\n]*A[^\S\r\n]*T[^\S\r\n]*U[^\S\r\n]*R[^\S\r\n]*E[^\S\r\n]*(S|\([^\S\r\n]*s[^\S\r\n]*\))?)([^\S\r\n]+)([^\S\r\n]?)",
-            remove_whitespace_signature,
-            text,
-            flags=re.IGNORECASE,
-        )
+        # Replace special characters with their corresponding substitutions - one pass for all of them
+        text = special_characters_pattern.sub(lambda match: special_characters_map[match[0]], text)
 
-        text = re.sub(
-            r"(ITEM|PART)(\s+\d{1,2}[AB]?)([\-•])",
-            r"\1\2 \3 ",
-            text,
-            flags=re.IGNORECASE,
+        # Fix broken section headers (PART, ITEM, SIGNATURE) - e.g. "I T E M 1" -> "ITEM 1"
+        text = broken_section_header_pattern.sub(
+            lambda match: f"{match[1]}{horizontal_whitespace_pattern.sub('', match[2])}", text
         )
 
+        text = item_part_separator_pattern.sub(r"\1\2 \3 ", text)
+
         # Remove unnecessary headers
-        regex_flags = re.IGNORECASE | re.MULTILINE
-        text = re.sub(
-            r"\n[^\S\r\n]*"
-            r"(TABLE\s+OF\s+CONTENTS|INDEX\s+TO\s+FINANCIAL\s+STATEMENTS|BACK\s+TO\s+CONTENTS|QUICKLINKS)"
-            r"[^\S\r\n]*\n",
-            "\n",
-            text,
-            flags=regex_flags,
-        )
+        text = unnecessary_headers_pattern.sub("\n", text)
 
         # Remove page numbers and headers
-        text = re.sub(
-            r"\n[^\S\r\n]*[-‒–—]*\d+[-‒–—]*[^\S\r\n]*\n", "\n", text, flags=regex_flags
-        )
-        text = re.sub(r"\n[^\S\r\n]*\d+[^\S\r\n]*\n", "\n", text, flags=regex_flags)
+        text = dashed_page_number_pattern.sub("\n", text)
+        text = page_number_pattern.sub("\n", text)
 
-        text = re.sub(r"[\n\s]F[-‒–—]*\d+", "", text, flags=regex_flags)
-        text = re.sub(
-            r"\n[^\S\r\n]*Page\s[\d*]+[^\S\r\n]*\n", "", text, flags=regex_flags
-        )
+        text = financial_page_number_pattern.sub("", text)
+        text = page_label_pattern.sub("", text)
 
         return text
 
@@ -416,13 +704,13 @@ class ExtractItems:
             str: The string without multiple new lines or spaces.
         """
         # Replace multiple new lines and spaces with a temporary token
-        text = re.sub(r"(( )*\n( )*){2,}", "#NEWLINE", text)
+        text = multiple_lines_pattern.sub("#NEWLINE", text)
         # Replace all new lines with a space
-        text = re.sub(r"\n", " ", text)
+        text = newline_pattern.sub(" ", text)
         # Replace temporary token with a single new line
-        text = re.sub(r"(#NEWLINE)+", "\n", text).strip()
+        text = newline_token_pattern.sub("\n", text).strip()
         # Replace multiple spaces with a single space
-        text = re.sub(r"[ ]{2,}", " ", text)
+        text = multiple_spaces_pattern.sub(" ", text)
 
         return text
 
@@ -479,7 +767,7 @@ class ExtractItems:
 
             # Check for bugs again
             texts = self.check_10q_parts_for_bugs(
-                text, texts, part_positions, self.filing_metadata
+                text, texts, part_positions
             )
 
             # Recalculate the length difference
@@ -607,11 +895,8 @@ class ExtractItems:
             Tuple[str, List[int]]: The item/section as a text string and the updated end positions of item sections.
         """
 
-        # Set the regex flags
-        regex_flags = re.IGNORECASE | re.DOTALL
-
         # Adjust the item index pattern
-        item_index_pattern = self.adjust_item_patterns(item_index)
+        item_index_pattern = adjust_item_pattern(item_index)
 
         # Determine the current part in case of 10-Q reports
         if "part" in item_index and "PART" not in item_index_pattern:
@@ -623,7 +908,8 @@ class ExtractItems:
         # But we do NOT want that specific text section; We want the detailed section which is *after* the ToC
 
         possible_sections_list = []  # possible list of (start, end) matches
-        impossible_match = None  # list of matches where no possible section was found - (start, None) matches
+        impossible_match = None  # start of a header match where no possible section was found
+        section_index = self.get_section_index(text)
         last_item = True
         for next_item_index in next_item_list:
             # Check if the next item is the last one
@@ -634,7 +920,7 @@ class ExtractItems:
                 last_item = True
 
             # Adjust the next item index pattern
-            next_item_index_pattern = self.adjust_item_patterns(next_item_index)
+            next_item_index_pattern = adjust_item_pattern(next_item_index)
 
             # Check if the next item is in a different part - in this case we exit the loop
             if "part" in next_item_index and "PART" not in next_item_index_pattern:
@@ -645,48 +931,28 @@ class ExtractItems:
                     break
 
             # Find all the text sections between the current item and the next item
-            matches = list(
-                re.finditer(
-                    rf"\n[^\S\r\n]*{item_index_pattern}[.*~\-:\s\(]",
-                    text,
-                    flags=regex_flags,
-                )
-            )
+            matches = section_index.header_matches(item_index)
             for i, match in enumerate(matches):
                 if i < ignore_matches:
                     # In some cases, the first matches might capture longer sections because parts/items are mentioned in the ToC.
                     # We detect this in another place and then skip the first [ignore_matches] matches until we are more certain to have the correct section.
                     continue
-                offset = match.start()
 
                 # First we do a case-sensitive search. This is because in some reports, parts or items are mentioned in the content,
                 # which we don't want to detect as a section header.
                 # The section headers are usually in uppercase, so checking this first avoids some errors.
-                possible = list(
-                    re.finditer(
-                        rf"\n[^\S\r\n]*{item_index_pattern}[.*~\-:\s\()].+?(\n[^\S\r\n]*{str(next_item_index_pattern)}[.*~\-:\s\(])",
-                        text[offset:],
-                        flags=re.DOTALL,
-                    )
-                )
+                possible = section_index.sections(item_index, next_item_index, True, match)
 
                 if not possible:
                     # If there is no match, follow with a case-insensitive search
-                    possible = list(
-                        re.finditer(
-                            rf"\n[^\S\r\n]*{item_index_pattern}[.*~\-:\s\()].+?(\n[^\S\r\n]*{str(next_item_index_pattern)}[.*~\-:\s\(])",
-                            text[offset:],
-                            flags=regex_flags,
-                        )
-                    )
+                    possible = section_index.sections(item_index, next_item_index, False, match)
 
                 # If there is a match, add it to the list of possible sections
                 if possible:
-                    possible_sections_list += [(offset, possible)]
+                    possible_sections_list.append(possible)
                 elif (
                         next_item_index == next_item_list[-1]
                         and not possible_sections_list
-                        and match
                 ):
                     # If there is no (start, end) section, there might only be a single item in the report (can happen for 8-K)
                     impossible_match = match
@@ -705,7 +971,7 @@ class ExtractItems:
             # SIGNATURE is the last one, get all the text from its beginning until EOF
             if item_index == "SIGNATURE":
                 item_section = self.get_last_item_section(item_index, text, positions)
-        elif impossible_match or last_item:
+        elif impossible_match is not None or last_item:
             # If there is only a single item in a report and no SIGNATURE (can happen for 8-K reports),
             # 'possible_sections_list' and thus also 'positions' will always be empty.
             # In this case we just want to extract from the match until the end of the document
@@ -731,15 +997,8 @@ class ExtractItems:
             str: All the remaining text until the end, starting from the specified item_index
         """
 
-        # Adjust the item index pattern
-        item_index_pattern = self.adjust_item_patterns(item_index)
-
         # Find all occurrences of the item/section using regex
-        item_list = list(
-            re.finditer(
-                rf"\n[^\S\r\n]*{item_index_pattern}[.\-:\s].+?", text, flags=regex_flags
-            )
-        )
+        item_list = list(last_item_regex(item_index).finditer(text))
 
         item_section = ""
         for item in item_list:
@@ -762,69 +1021,34 @@ class ExtractItems:
 
     def adjust_item_patterns(self, item_index: str) -> str:
         """
-        Adjust the item_pattern for matching in the document text depending on the item index. This is necessary on a case by case basis.
+        Adjust the item_pattern for matching in the document text depending on the item index.
+        See adjust_item_pattern, which this delegates to.
 
         Args:
             item_index (str): The item index to adjust the pattern for.
-                              For 10-Q preprocessing, this can also be part_1 or part_2.
 
         Returns:
             item_index_pattern (str): The adjusted item pattern
         """
+        return adjust_item_pattern(item_index)
 
-        # For 10-Q reports, we have two parts of items: part1 and part2
-        if "part" in item_index:
-            if "__" not in item_index:
-                # We are searching for the general part, not a specific item (e.g. PART I)
-                item_index_number = item_index.split("_")[1]
-                item_index_pattern = rf"PART\s*(?:{roman_numeral_map[item_index_number]}|{item_index_number})"
-                return item_index_pattern
-            else:
-                # We are working with an item, but we just consider the string after the part as the item_index
-                item_index = item_index.split("__")[1]
-
-        # Create a regex pattern from the item index
-        item_index_pattern = item_index
-
-        # Modify the item index format for matching in the text
-        if item_index == "9A":
-            item_index_pattern = item_index_pattern.replace(
-                "A", r"[^\S\r\n]*A(?:\(T\))?"
-            )  # Regex pattern for item index "9A"
-        elif item_index == "SIGNATURE":
-            # Quit here so the A in SIGNATURE is not changed
-            pass
-        elif "A" in item_index:
-            item_index_pattern = item_index_pattern.replace(
-                "A", r"[^\S\r\n]*A"
-            )  # Regex pattern for other "A" item indexes
-        elif "B" in item_index:
-            item_index_pattern = item_index_pattern.replace(
-                "B", r"[^\S\r\n]*B"
-            )  # Regex pattern for "B" item indexes
-        elif "C" in item_index:
-            item_index_pattern = item_index_pattern.replace(
-                "C", r"[^\S\r\n]*C"
-            )  # Regex pattern for "C" item indexes
-
-        # If the item is SIGNATURE, we don't want to look for ITEM
-        if item_index == "SIGNATURE":
-            # Some reports have SIGNATURES or Signature(s) instead of SIGNATURE
-            item_index_pattern = rf"{item_index}(s|\(s\))?"
-        else:
-            if "." in item_index:
-                # We need to escape the '.', otherwise it will be treated as a special character - for 8Ks
-                item_index = item_index.replace(".", r"\.")
-            if item_index in roman_numeral_map:
-                # Rarely, reports use roman numerals for the item indexes. For 8-K, we assume this does not occur (due to their format - e.g. 5.01)
-                item_index = f"(?:{roman_numeral_map[item_index]}|{item_index})"
-            item_index_pattern = rf"ITEMS?\s*{item_index}"
+    def get_section_index(self, text: str) -> "SectionIndex":
+        """
+        Returns the SectionIndex of a text, reusing the previous one as long as the same text is parsed.
 
-        return item_index_pattern
+        Args:
+            text (str): The report text (or the text of a 10-Q part).
+
+        Returns:
+            SectionIndex: The header index of the text.
+        """
+        if self.section_index is None or self.section_index.text is not text:
+            self.section_index = SectionIndex(text)
+        return self.section_index
 
     @staticmethod
     def get_item_section(
-            possible_sections_list: List[Tuple[int, List[re.Match]]],
+            possible_sections_list: List[List[Tuple[int, int, int]]],
             text: str,
             positions: List[int],
     ) -> Tuple[str, List[int]]:
@@ -832,7 +1056,8 @@ class ExtractItems:
         Returns the correct section from a list of all possible item sections.
 
         Args:
-            possible_sections_list: List containing all the possible sections between Item X and Item Y.
+            possible_sections_list: List containing all the possible sections between Item X and Item Y,
+                                    as (start, start of the next item header, end) positions in the text.
             text: The whole text.
             positions: List of the end positions of previous item sections.
 
@@ -843,45 +1068,35 @@ class ExtractItems:
         # Initialize variables
         item_section: str = ""
         max_match_length: int = 0
-        max_match: Optional[re.Match] = None
-        max_match_offset: Optional[int] = None
+        max_match: Optional[Tuple[int, int, int]] = None
 
         # Find the match with the largest section
-        for offset, matches in possible_sections_list:
+        for sections in possible_sections_list:
             # Find the match with the largest section
-            for match in matches:
-                match_length = match.end() - match.start()
+            for match in sections:
+                start, _, end = match
+                match_length = end - start
                 # If there are previous item sections, check if the current match is after the last item section
                 if positions:
-                    if (
-                            match_length > max_match_length
-                            and offset + match.start() >= positions[-1]
-                    ):
+                    if match_length > max_match_length and start >= positions[-1]:
                         max_match = match
-                        max_match_offset = offset
                         max_match_length = match_length
                 # If there are no previous item sections, just get the first match
                 elif match_length > max_match_length:
                     max_match = match
-                    max_match_offset = offset
                     max_match_length = match_length
 
         # Return the text section inside that match
         if max_match:
+            start, next_item_start, _ = max_match
             # If there are previous item sections, check if the current match is after the last item section and get it
             if positions:
-                if max_match_offset + max_match.start() >= positions[-1]:
-                    item_section = text[
-                                   max_match_offset + max_match.start() : max_match_offset
-                                                                          + max_match.regs[1][0]
-                                   ]
+                if start >= positions[-1]:
+                    item_section = text[start:next_item_start]
             else:  # If there are no previous item sections, just get the text section inside that match
-                item_section = text[
-                               max_match_offset + max_match.start() : max_match_offset
-                                                                      + max_match.regs[1][0]
-                               ]
+                item_section = text[start:next_item_start]
             # Update the list of end positions
-            positions.append(max_match_offset + max_match.end() - len(max_match[1]) - 1)
+            positions.append(next_item_start - 1)
 
         return item_section, positions
 
@@ -950,3 +1165,165 @@ class HtmlStripper(HTMLParser):
         """
         self.feed(html)
         return self.get_data()
+
+
+class HtmlTextExtractor:
+    """
+    Converts an HTML document to text in a single lxml parse, without building a document tree.
+
+    The class is used as the target of lxml's HTMLParser: the parser calls its start/end/data methods for every
+    element and text node, and the text is written out directly. This gives the same result as parsing the document
+    with BeautifulSoup, checking it for <td> and <tr> tags, handling its spans with ExtractItems.handle_spans and
+    stripping the serialized tree with ExtractItems.strip_html:
+        - Whitespace-only text nodes are collapsed to a single newline or space, as BeautifulSoup does.
+        - Spans containing text are unwrapped, all other spans are replaced with a single space.
+        - Closing div, tr, p and li tags and <br> tags are followed by two newlines, closing td and th tags are
+          surrounded by spaces.
+        - Comments and processing instructions are dropped, the doctype leaves a newline.
+
+    Attributes:
+            is_html (bool): Whether the document contains <td> and <tr> tags.
+    """
+
+    # Tags whose text BeautifulSoup keeps as is
+    preserve_whitespace_tags = {"pre", "textarea"}
+    # Tags whose text BeautifulSoup does not count as text when checking a span with get_text
+    non_text_tags = {"script", "style", "template", "rt", "rp"}
+    # Tags whose text is serialized without escaping and is therefore not parsed by HtmlStripper
+    raw_text_tags = {"script", "style"}
+    block_tags = {"div", "tr", "p", "li"}
+    cell_tags = {"th", "td"}
+
+    # A document without these cannot contain <td> and <tr> tags, so it does not have to be parsed at all
+    table_cell_pattern = re.compile(r"<td", re.IGNORECASE)
+    table_row_pattern = re.compile(r"<tr", re.IGNORECASE)
+
+    def __init__(self) -> None:
+        """
+        Initializes the parser state.
+        """
+        self.is_html = False
+        self._has_td = False
+        self._has_tr = False
+        self._tags = []  # (tag name, has attributes) of the open elements
+        self._spans = [[[], False]]  # (text pieces, contains text) of the open spans, the document itself first
+        self._data = []  # Text received since the last tag
+        self._preserve_whitespace = 0
+        self._non_text = 0
+
+    def extract(self, document: str) -> Optional[str]:
+        """
+        Convert a document to text if it is an HTML document.
+
+        Args:
+            document (str): The document.
+
+        Returns:
+            Optional[str]: The text of the document, or None if it is not an HTML document (no <td> and <tr> tags).
+        """
+        if not self.table_cell_pattern.search(document) or not self.table_row_pattern.search(document):
+            return None
+
+        if document.startswith("\N{BYTE ORDER MARK}"):
+            document = document[1:]
+        try:
+            self._parse(document, None)
+        except (UnicodeDecodeError, LookupError, etree.ParserError):
+            # Same fallback as BeautifulSoup: let lxml decode the document itself
+            self.__init__()
+            self._parse(document.encode("utf8"), "utf8")
+
+        self.is_html = self._has_td and self._has_tr
+        if not self.is_html:
+            return None
+        return "".join(self._spans[0][0])
+
+    def _parse(self, document, encoding: Optional[str]) -> None:
+        parser = etree.HTMLParser(target=self, recover=True, encoding=encoding)
+        parser.feed(document)
+        parser.close()
+
+    def start(self, tag: str, attrib: dict) -> None:
+        self._end_data()
+        if tag == "td":
+            self._has_td = True
+        elif tag == "tr":
+            self._has_tr = True
+        elif tag == "span":
+            self._spans.append([[], False])
+        if tag in self.preserve_whitespace_tags:
+            self._preserve_whitespace += 1
+        if tag in self.non_text_tags:
+            self._non_text += 1
+        self._tags.append((tag, bool(attrib)))
+
+    def end(self, tag: str) -> None:
+        self._end_data()
+        if not self._tags:
+            return
+        tag, has_attributes = self._tags.pop()
+        if tag in self.preserve_whitespace_tags:
+            self._preserve_whitespace -= 1
+        if tag in self.non_text_tags:
+            self._non_text -= 1
+
+        pieces = self._spans[-1][0]
+        if tag in self.block_tags:
+            pieces.append("\n\n")
+        elif tag in self.cell_tags:
+            pieces.append("  ")
+        elif tag == "br" and not has_attributes:
+            # <br> with attributes is not matched by ExtractItems.strip_html
+            pieces.append("\n\n")
+        elif tag == "span" and len(self._spans) > 1:
+            pieces, has_text = self._spans.pop()
+            parent = self._spans[-1]
+            if has_text:
+                # Unwrap the span
+                parent[0].extend(pieces)
+                parent[1] = True
+            else:
+                # Spans without text are used for margins
+                parent[0].append(" ")
+
+    def data(self, data: str) -> None:
+        self._data.append(data)
+
+    def comment(self, text: str) -> None:
+        self._end_data()
+
+    def pi(self, target: str, data: Optional[str] = None) -> None:
+        self._end_data()
+
+    def doctype(self, *args) -> None:
+        self._end_data()
+        # BeautifulSoup serializes the doctype with a trailing newline, which HtmlStripper keeps as text
+        self._spans[-1][0].append("\n")
+
+    def close(self) -> None:
+        self._end_data()
+        while self._tags:
+            self.end(self._tags[-1][0])
+
+    def _end_data(self) -> None:
+        """
+        Write out the text received since the last tag.
+        """
+        if not self._data:
+            return
+        data = "".join(self._data)
+        self._data = []
+
+        if not self._preserve_whitespace and not data.strip(" \n\t\x0c\r"):
+            data = "\n" if "\n" in data else " "
+
+        if self._tags and self._tags[-1][0] in self.raw_text_tags:
+            # The tag patterns of strip_html still apply to raw text, HtmlStripper leaves it untouched otherwise
+            data = block_closing_tag_pattern.sub(r"\1\n\n", data)
+            data = line_break_tag_pattern.sub(r"\1\n\n", data)
+            data = cell_closing_tag_pattern.sub(r" \1 ", data)
+
+        span = self._spans[-1]
+        span[0].append(data)
+        if not self._non_text and data.strip():
+            span[1] = True
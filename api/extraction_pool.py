@@ -0,0 +1,236 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from config import EXTRACTION_QUEUE_DEPTH, EXTRACTION_TIMEOUT, EXTRACTION_WORKERS
+
+
+class ExtractionQueueFull(Exception):
+    """Raised when EXTRACTION_QUEUE_DEPTH extractions are already running or waiting."""
+
+
+class ExtractionTimeout(Exception):
+    """Raised when an extraction did not finish within EXTRACTION_TIMEOUT seconds."""
+
+
+class ExtractionError(Exception):
+    """Raised when ExtractItems failed in the worker process or the worker died."""
+
+
+def _worker_main(conn) -> None:
+    """
+    Entry point of an extraction process: extracts the filings sent over the pipe until it is closed.
+    """
+    # Imported here so the API process does not need the extractor loaded to start the workers
+    from extract_items import ExtractItems
+
+    while True:
+        try:
+            metadata, document_text, items_to_extract = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            result = ("ok", ExtractItems(metadata, document_text, items_to_extract).get_json())
+        except Exception as err:
+            result = ("error", f"{type(err).__name__}: {err}")
+        conn.send(result)
+
+
+class _Worker:
+    """
+    One extraction process and the parent's end of the pipe to it.
+    """
+
+    def __init__(self, context) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def run(self, metadata: Dict[str, Any], document_text: str, items_to_extract: List[str]) -> tuple:
+        # Blocking, called from a thread
+        self.conn.send((metadata, document_text, items_to_extract))
+        return self.conn.recv()
+
+    def kill(self) -> None:
+        # Killing the process also ends a recv() that is still waiting for it in another thread,
+        # the pipe is closed once that thread lets go of it
+        self.process.kill()
+        self.process.join(timeout=5)
+
+
+class ExtractionPool:
+    """
+    Bounded pool of processes that run ExtractItems, so CPU-bound extraction neither blocks the event loop
+    nor competes with the other requests of the API worker for the GIL.
+
+    Extractions wait in FIFO order for an idle worker. At most `queue_depth` extractions can be running or waiting;
+    beyond that extract() raises ExtractionQueueFull instead of letting the backlog grow. An extraction that exceeds
+    `timeout`, or whose caller is cancelled, has its worker process killed and replaced.
+
+    Attributes:
+        workers (int): Number of worker processes.
+        queue_depth (int): Maximum number of running plus waiting extractions.
+        timeout (float): Seconds a single extraction may run.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, timeout: float) -> None:
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        # spawn instead of fork: forking a process that runs an event loop and DB connection pools is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._idle: Optional[asyncio.Queue] = None
+        self._all = []
+        # One thread per worker waits for its result, so the default executor is not tied up
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._busy = 0
+        self._replacing = set()  # Background replacements of the workers of cancelled extractions
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._idle is not None:
+                return
+            workers = []
+            try:
+                for _ in range(self.workers):
+                    workers.append(_Worker(self._context))
+            except Exception:
+                for worker in workers:
+                    worker.kill()
+                raise
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="extraction")
+            idle = asyncio.Queue()
+            for worker in workers:
+                idle.put_nowait(worker)
+            self._all = workers
+            self._idle = idle
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        with self._lock:
+            if worker not in self._all:
+                # The pool was closed in the meantime
+                return worker
+            replacement = _Worker(self._context)
+            self._all[self._all.index(worker)] = replacement
+        return replacement
+
+    def _replace_in_background(self, worker: _Worker, idle: asyncio.Queue) -> None:
+        task = asyncio.ensure_future(self._replace_and_release(worker, idle))
+        # Keep a reference, the event loop only holds weak ones
+        self._replacing.add(task)
+        task.add_done_callback(self._replacing.discard)
+
+    async def _replace_and_release(self, worker: _Worker, idle: asyncio.Queue) -> None:
+        try:
+            worker = await asyncio.to_thread(self._replace, worker)
+        except Exception as err:
+            # Hand back the dead worker, the next extraction on it fails and replaces it again
+            print(f"Could not replace extraction worker: {str(err)}")
+        idle.put_nowait(worker)
+
+    async def extract(self, metadata: Dict[str, Any], document_text: str,
+                      items_to_extract: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Run ExtractItems(metadata, document_text, items_to_extract).get_json() in a worker process.
+
+        Args:
+            metadata (Dict[str, Any]): The filing metadata passed to ExtractItems.
+            document_text (str): The filing document.
+            items_to_extract (Optional[List[str]]): The items to extract, all items of the filing type if None.
+
+        Returns:
+            Dict[str, Any]: The extracted items.
+
+        Raises:
+            ExtractionQueueFull: Too many extractions are running or waiting already.
+            ExtractionTimeout: The extraction took longer than `timeout` seconds.
+            ExtractionError: ExtractItems raised an exception or the worker process died.
+        """
+        if self._pending >= self.queue_depth:
+            self.rejected += 1
+            raise ExtractionQueueFull()
+
+        self._pending += 1
+        try:
+            if self._idle is None:
+                await asyncio.to_thread(self._start)
+            idle = self._idle
+            worker = await idle.get()
+            self._busy += 1
+            try:
+                loop = asyncio.get_running_loop()
+                status, payload = await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, worker.run, metadata, document_text, items_to_extract or []),
+                    self.timeout
+                )
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                worker = await asyncio.to_thread(self._replace, worker)
+                raise ExtractionTimeout()
+            except asyncio.CancelledError:
+                # Nobody is waiting for the result anymore, free the worker for the next extraction. Killing and
+                # starting a process blocks, so it happens in the background and the worker is handed back there.
+                self.cancelled += 1
+                self._replace_in_background(worker, idle)
+                worker = None
+                raise
+            except (EOFError, OSError) as err:
+                self.failed += 1
+                worker = await asyncio.to_thread(self._replace, worker)
+                raise ExtractionError(f"Extraction worker died: {err}")
+            finally:
+                self._busy -= 1
+                if worker is not None:
+                    idle.put_nowait(worker)
+        finally:
+            self._pending -= 1
+
+        if status != "ok":
+            self.failed += 1
+            raise ExtractionError(payload)
+        self.completed += 1
+        return payload
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return the size and counters of the pool.
+        """
+        return {
+            "workers": self.workers,
+            "started": self._idle is not None,
+            "queue_depth": self.queue_depth,
+            "timeout": self.timeout,
+            "busy": self._busy,
+            "waiting": self._pending - self._busy,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+        }
+
+    def close(self) -> None:
+        """
+        Stop all worker processes. Called on application shutdown.
+        """
+        with self._lock:
+            workers, self._all = self._all, []
+            executor, self._executor = self._executor, None
+            self._idle = None
+        for worker in workers:
+            worker.kill()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+extraction_pool = ExtractionPool(EXTRACTION_WORKERS, EXTRACTION_QUEUE_DEPTH, EXTRACTION_TIMEOUT)
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import extract_items
+import item_lists
+from models import FilingExtraction
+
+# Every module whose code influences the output of ExtractItems. Changing any of them changes the fingerprint,
+# so stored extractions made by an older version of the code are recomputed on their next request.
+EXTRACTOR_MODULES = [extract_items, item_lists]
+
+
+def compute_extractor_version() -> str:
+    """
+    Fingerprint the extraction code by hashing the source of the modules in EXTRACTOR_MODULES.
+
+    Returns:
+        str: A short hex digest identifying the current extractor.
+    """
+    digest = hashlib.sha256()
+    for module in EXTRACTOR_MODULES:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+EXTRACTOR_VERSION = compute_extractor_version()
+
+
+def load_extraction(db: Session, file_name: str, partial: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Return the stored extraction for a filing if it was produced by the current extractor version.
+
+    Args:
+        db (Session): Database session.
+        file_name (str): EDGAR path of the filing, as passed to /filing-content.
+        partial (bool): Also return an extraction that only contains some of the items.
+
+    Returns:
+        Optional[Dict[str, Any]]: The extracted items, or None if nothing usable is stored.
+    """
+    extraction = db.query(FilingExtraction).filter(FilingExtraction.file_name == file_name).first()
+    if not extraction or extraction.extractor_version != EXTRACTOR_VERSION:
+        return None
+    if not extraction.complete and not partial:
+        return None
+
+    return _decode_content(file_name, extraction.content)
+
+
+def _decode_content(file_name: str, blob: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+    except (zlib.error, ValueError) as err:
+        print(f"Discarding unreadable extraction for {file_name}: {err}")
+        return None
+
+
+def save_extraction(db: Session, file_name: str, content: Dict[str, Any], complete: bool = True) -> None:
+    """
+    Store the extraction for a filing, replacing any result from an older extractor version.
+
+    A partial extraction (only some items) is merged into the partial extraction already stored for the filing,
+    so the items of earlier requests are kept. It never replaces a complete one.
+
+    Args:
+        db (Session): Database session.
+        file_name (str): EDGAR path of the filing, as passed to /filing-content.
+        content (Dict[str, Any]): The JSON returned by ExtractItems.get_json().
+        complete (bool): Whether the content contains all items of the filing.
+    """
+    try:
+        extraction = db.query(FilingExtraction).filter(FilingExtraction.file_name == file_name).first()
+        if extraction and extraction.extractor_version == EXTRACTOR_VERSION and not complete:
+            if extraction.complete:
+                return
+            # Two partial extractions finishing at the same time may overwrite each other's items,
+            # the lost ones are simply extracted again when they are requested
+            content = {**(_decode_content(file_name, extraction.content) or {}), **content}
+
+        blob = zlib.compress(json.dumps(content, ensure_ascii=False).encode("utf-8"), 6)
+        if extraction:
+            extraction.extractor_version = EXTRACTOR_VERSION
+            extraction.content = blob
+            extraction.complete = complete
+        else:
+            db.add(FilingExtraction(
+                file_name=file_name,
+                extractor_version=EXTRACTOR_VERSION,
+                content=blob,
+                complete=complete
+            ))
+        db.commit()
+    except IntegrityError:
+        # Another request stored the same filing in the meantime; its result is just as good
+        db.rollback()
+    except Exception as e:
+        db.rollback()
+        print(f"Could not store extraction for {file_name}: {e}")
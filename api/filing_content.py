@@ -1,18 +1,18 @@
-from fastapi import APIRouter, Request, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, Request, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Any, AsyncIterator, Dict, List, Optional
 from bs4 import BeautifulSoup
-import requests
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from urllib.parse import urljoin
 import re
-from extract_items import ExtractItems
-from config import USER_AGENT
-from retry import requests_retry_session
-from requests.exceptions import (
-    ConnectionError,
-    HTTPError,
-    RequestException,
-    RetryError,
-    Timeout,
-)
+import zlib
+from extract_items import get_items_list, item_json_key, item_list_other
+from extraction_pool import extraction_pool, ExtractionError, ExtractionQueueFull, ExtractionTimeout
+from extraction_store import load_extraction, save_extraction
+from db import get_db, SessionLocal
+from sec_client import fetch_document, open_document_stream
+from single_flight import filing_flights
 
 try:
     from html.parser.HTMLParser import HTMLParseError
@@ -20,47 +20,266 @@ except ImportError:  # Python 3.5+
     class HTMLParseError(Exception):
         pass
 
+try:
+    import brotli
+except ImportError:  # Optional, without it streamed documents are gzip-compressed
+    brotli = None
+
 router = APIRouter(tags=["filing-content"])
 
+IMG_TAG_PATTERN = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+SRC_ATTRIBUTE_PATTERN = re.compile(r"""((?<![\w-])src\s*=\s*)(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+# Longest unterminated tag kept back between chunks, beyond that the text is passed on as it is
+MAX_TAG_CARRY = 64 * 1024
+
+
+def resolve_image_source(document_url: str, src: str) -> str:
+    """
+    Return the absolute URL of an <img src> of a filing document.
+
+    Args:
+        document_url (str): URL of the document, relative sources are resolved against it.
+        src (str): The src attribute as written in the document.
+
+    Returns:
+        str: The absolute URL; absolute URLs, data: URIs and empty sources are returned unchanged.
+    """
+    if not src or src.startswith(("http://", "https://", "data:")):
+        return src
+    return urljoin(document_url, src)
+
+
+def fix_image_sources(document_text: str, document_url: str) -> str:
+    """
+    Rewrite relative <img src> paths in a filing document so they point to sec.gov.
+
+    Args:
+        document_text (str): The HTML of the filing document.
+        document_url (str): URL of the document, relative sources are resolved against it.
+
+    Returns:
+        str: The HTML with absolute image sources.
+    """
+    content_soup = BeautifulSoup(document_text, "lxml")
+    for img in content_soup.find_all("img"):
+        if img.get("src"):
+            img["src"] = resolve_image_source(document_url, img["src"])
+    return str(content_soup)
+
+
+class ImageSourceRewriter:
+    """
+    Rewrites relative <img src> paths in an HTML document that arrives in chunks.
+
+    A tag cut in two by a chunk boundary is held back until the next chunk completes it, so at most one
+    unterminated tag (up to MAX_TAG_CARRY characters) is buffered at any time.
+
+    Attributes:
+        document_url (str): URL of the document, relative sources are resolved against it.
+    """
+
+    def __init__(self, document_url: str) -> None:
+        self.document_url = document_url
+        self._carry = ""
+
+    def feed(self, chunk: str) -> str:
+        """
+        Rewrite the next chunk of the document.
+
+        Args:
+            chunk (str): The next part of the document.
+
+        Returns:
+            str: The rewritten text that is complete so far, possibly empty.
+        """
+        text = self._carry + chunk
+        tag_start = text.rfind("<")
+        if tag_start != -1 and text.find(">", tag_start) == -1 and len(text) - tag_start <= MAX_TAG_CARRY:
+            text, self._carry = text[:tag_start], text[tag_start:]
+        else:
+            self._carry = ""
+        return IMG_TAG_PATTERN.sub(self._rewrite_tag, text)
+
+    def flush(self) -> str:
+        """
+        Return whatever was held back at the end of the document.
+        """
+        text, self._carry = self._carry, ""
+        return IMG_TAG_PATTERN.sub(self._rewrite_tag, text)
+
+    def _rewrite_tag(self, tag: re.Match) -> str:
+        return SRC_ATTRIBUTE_PATTERN.sub(self._rewrite_src, tag.group(0), count=1)
+
+    def _rewrite_src(self, attribute: re.Match) -> str:
+        prefix, double_quoted, single_quoted, bare = attribute.groups()
+        src = next(value for value in (double_quoted, single_quoted, bare) if value is not None)
+        resolved = resolve_image_source(self.document_url, src)
+        if resolved == src:
+            return attribute.group(0)
+        src = resolved
+        if single_quoted is not None:
+            return f"{prefix}'{src}'"
+        return f'{prefix}"{src}"'
+
+
+def choose_content_encoding(accept_encoding: str) -> str:
+    """
+    Pick the compression for a streamed response from the Accept-Encoding request header.
+
+    Args:
+        accept_encoding (str): The Accept-Encoding header, e.g. "gzip, deflate, br".
+
+    Returns:
+        str: "br" (if the brotli package is installed), "gzip" or "identity".
+    """
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = params.strip().replace(" ", "")
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return "identity"
+
+
+async def stream_document(chunks: AsyncIterator[str], document_url: str, encoding: str) -> AsyncIterator[bytes]:
+    """
+    Rewrite image sources in a streamed document and encode it for the response.
+
+    Args:
+        chunks (AsyncIterator[str]): The document text as it arrives.
+        document_url (str): URL of the document, relative image sources are resolved against it.
+        encoding (str): Content encoding from choose_content_encoding.
+
+    Yields:
+        bytes: The encoded response body, one piece per document chunk.
+    """
+    rewriter = ImageSourceRewriter(document_url)
+    compressor: Optional[Any] = None
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+    elif encoding == "gzip":
+        # wbits=31 writes a gzip header and trailer
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def encode(text: str, last: bool = False) -> bytes:
+        data = text.encode("utf-8")
+        if compressor is None:
+            return data
+        if encoding == "br":
+            return compressor.process(data) + (compressor.finish() if last else compressor.flush())
+        # A sync flush after every chunk keeps the first bytes from waiting for the compressor's buffer to fill
+        return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
 
-@router.get("/filing-content/raw/{file_name:path}")
-def get_raw_filing(request: Request, file_name: str) -> Dict[str, Any] | None:
-    html_index = f"https://www.sec.gov/Archives/{file_name.replace('.txt', '-index.html')}"
+    try:
+        async for chunk in chunks:
+            data = encode(rewriter.feed(chunk))
+            if data:
+                yield data
+        yield encode(rewriter.flush(), last=True)
+    finally:
+        await chunks.aclose()
+
+
+def store_extraction(file_name: str, extracted: Dict[str, Any], complete: bool = True) -> None:
+    """
+    Save an extraction with a session of its own, since the request that started it may have finished already.
+    """
+    db = SessionLocal()
+    try:
+        save_extraction(db, file_name, extracted, complete)
+    finally:
+        db.close()
 
-    print(f"Processing html_index: {html_index}")
 
-    try:
-        retries_exceeded = True
-        for _ in range(5):
-            session = requests.Session()
-            req = requests_retry_session(
-                retries=5, backoff_factor=0.2, session=session
-            ).get(url=html_index, headers={"User-agent": USER_AGENT})
-
-            if "will be managed until action is taken to declare your traffic." not in req.text:
-                retries_exceeded = False
-                break
+@router.get("/filing-content/raw/{file_name:path}")
+async def get_raw_filing(request: Request, file_name: str) -> Dict[str, Any] | None:
+    # Concurrent requests for the same filing share one download
+    return await filing_flights.run(("raw", file_name), lambda: fetch_raw_filing(file_name))
 
-        if retries_exceeded:
-            print("Retries exceeded")
-            return None
 
-    except (RequestException, HTTPError, ConnectionError, Timeout, RetryError) as err:
-        print(
-            f"Request for {html_index} failed due to network-related error: {err}"
-        )
-        print("Request for {html_index} failed due to network-related error: {err}")
+async def fetch_raw_filing(file_name: str) -> Dict[str, Any] | None:
+    document = await find_raw_document(file_name)
+    if document is None:
+        return None
+
+    document_text = await fetch_document(document["filename"])
+    if document_text is None:
         return None
 
-    print("downloaded html index")
+    # Process the HTML to fix image sources
+    raw_content = await run_in_threadpool(fix_image_sources, document_text, document["filename"])
+
+    return {**document, "raw_content": raw_content}
+
+
+@router.get("/filing-content/raw-stream/{file_name:path}")
+async def stream_raw_filing(request: Request, file_name: str) -> StreamingResponse:
+    """
+    Stream the primary document of a filing as it is downloaded, with image sources rewritten to sec.gov.
+
+    Unlike /filing-content/raw, the document is never held in memory as a whole: every chunk is passed on
+    as soon as it arrives from the SEC (or the document cache), compressed with brotli or gzip when the client
+    accepts it. The filing type, date and document URL are sent in the X-Filing-* headers.
+    """
+    # Concurrent requests for the same filing share the index lookup, each one streams the document itself
+    document = await filing_flights.run(("raw-document", file_name), lambda: find_raw_document(file_name))
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Filing not found: {file_name}")
 
-    soup = BeautifulSoup(req.content, "lxml")
+    chunks = await open_document_stream(document["filename"])
+    if chunks is None:
+        raise HTTPException(status_code=502, detail=f"Could not download the filing document: {document['filename']}")
+
+    encoding = choose_content_encoding(request.headers.get("accept-encoding", ""))
+    headers = {
+        "X-Filing-Type": document["Type"],
+        "X-Filing-Date": document["Date"],
+        "X-Filing-Document": document["filename"],
+        "Vary": "Accept-Encoding",
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    media_type = "text/plain" if document["filename"].endswith(".txt") else "text/html"
+
+    return StreamingResponse(
+        stream_document(chunks, document["filename"], encoding),
+        media_type=media_type,
+        headers=headers
+    )
+
+
+# Form types whose primary document is extracted, the complete submission text file is used for all others
+EXTRACTED_FORM_TYPES = ["10-K", "10-Q", "8-K"]
+
+
+def parse_filing_index(index_text: str, form_types: Optional[List[str]] = None) -> Dict[str, Any] | None:
+    """
+    Read the type, date and document URL of a filing from its EDGAR index page (...-index.html).
+
+    Args:
+        index_text (str): The HTML of the index page.
+        form_types (Optional[List[str]]): Take the first HTML document of one of these types, or else the complete
+            submission text file. None takes the first document of the filing, whatever its type.
+
+    Returns:
+        Dict[str, Any] | None: "Type", "Date" and "filename" (the document URL), or None if the page lacks any.
+    """
+    soup = BeautifulSoup(index_text, "lxml")
 
     try:
         filing_type_text = soup.find("div", id="formName").find("strong").get_text(strip=True)
         filing_type = re.search(r"Form\s+(.+)", filing_type_text).group(1)
     except (HTMLParseError, Exception):
-        print("No filing type found")
         return None
 
     filing_date = None
@@ -77,168 +296,143 @@ def get_raw_filing(request: Request, file_name: str) -> Dict[str, Any] | None:
     if filing_date is None:
         return None
 
-    all_tables = soup.find_all("table")
-    # filing_types = ["10-K", "10-Q", "8-K"]
-
-    print("Searching for document format files")
-
-    for table in all_tables:
-        if table.attrs.get("summary") == "Document Format Files":
-            htm_file_link, complete_text_file_link, link_to_download = None, None, None
-
-            for tr in table.find_all("tr")[1:]:
-                # if tr.contents[7].text in filing_types:
-                    # if tr.contents[5].contents[0].attrs["href"].split(".")[-1] in ["htm", "html"]:
-                        htm_file_link = "https://www.sec.gov" + tr.contents[5].contents[0].attrs["href"]
-                        break
-                # elif tr.contents[3].text == "Complete submission text file":
-                #     complete_text_file_link = "https://www.sec.gov" + tr.contents[5].contents[0].attrs["href"]
-                #     break
-
-            if htm_file_link:
-                link_to_download = htm_file_link.replace("ix?doc=/",
-                                                         "") if "ix?doc=/" in htm_file_link else htm_file_link
-            elif complete_text_file_link:
-                link_to_download = complete_text_file_link
-
-            print(link_to_download)
-
-            if link_to_download:
-                try:
-                    retries_exceeded = True
-                    for _ in range(5):
-                        session = requests.Session()
-                        req = requests_retry_session(
-                            retries=5, backoff_factor=0.2, session=session
-                        ).get(url=link_to_download, headers={"User-agent": USER_AGENT})
-
-                        if "will be managed until action is taken to declare your traffic." not in req.text:
-                            retries_exceeded = False
-                            break
-
-                    if retries_exceeded:
-                        print(f'Retries exceeded, could not download "{link_to_download}')
-                        return None
-                    
-                    print(f"req.text length: {len(req.text)}")
-
-                    # Process the HTML to fix image sources
-                    content_soup = BeautifulSoup(req.text, "lxml")
-                    for img in content_soup.find_all("img"):
-                        if img.get("src") and not img["src"].startswith(("http://", "https://")):
-                            img["src"] = "https://www.sec.gov" + img["src"]
-
-                    return {
-                        "Type": filing_type,
-                        "Date": filing_date,
-                        "filename": link_to_download,
-                        "raw_content": str(content_soup)
-                    }
-
-                except (RequestException, HTTPError, ConnectionError, Timeout, RetryError) as err:
-                    print(f"Request for {link_to_download} failed due to network-related error: {err}")
-                    return None
-            print("No link to download found")
-            return None
-    print("No link to download found")
-    return None
+    table = soup.find("table", summary="Document Format Files")
+    if table is None:
+        return None
 
+    htm_file_link, complete_text_file_link = None, None
+    for tr in table.find_all("tr")[1:]:
+        href = tr.contents[5].contents[0].attrs["href"]
+        if form_types is None:
+            htm_file_link = "https://www.sec.gov" + href
+            break
+        if tr.contents[7].text in form_types:
+            if href.split(".")[-1] in ["htm", "html"]:
+                htm_file_link = "https://www.sec.gov" + href
+                break
+        elif tr.contents[3].text == "Complete submission text file":
+            complete_text_file_link = "https://www.sec.gov" + href
+            break
 
-@router.get("/filing-content/{file_name:path}")
-def get_filing(request: Request, file_name: str) -> Dict[str, Any] | None:
-    html_index = f"https://www.sec.gov/Archives/{file_name.replace('.txt', '-index.html')}"
+    if htm_file_link:
+        # Inline XBRL documents are linked through the viewer, e.g. /ix?doc=/Archives/...
+        link_to_download = htm_file_link.replace("ix?doc=/", "")
+    else:
+        link_to_download = complete_text_file_link
+    if not link_to_download:
+        return None
 
-    try:
-        retries_exceeded = True
-        for _ in range(5):
-            session = requests.Session()
-            req = requests_retry_session(
-                retries=5, backoff_factor=0.2, session=session
-            ).get(url=html_index, headers={"User-agent": USER_AGENT})
-
-            if "will be managed until action is taken to declare your traffic." not in req.text:
-                retries_exceeded = False
-                break
+    return {
+        "Type": filing_type,
+        "Date": filing_date,
+        "filename": link_to_download
+    }
 
-        if retries_exceeded:
-            return None
 
-    except (RequestException, HTTPError, ConnectionError, Timeout, RetryError) as err:
-        print(
-            f"Request for {html_index} failed due to network-related error: {err}"
-        )
+async def find_raw_document(file_name: str) -> Dict[str, Any] | None:
+    """
+    Look up the type, date and primary document URL of a filing on its EDGAR index page.
+
+    Args:
+        file_name (str): The filing path below /Archives/, e.g. edgar/data/320193/0000320193-23-000106.txt.
+
+    Returns:
+        Dict[str, Any] | None: "Type", "Date" and "filename" (the document URL), or None if the filing was not found.
+    """
+    index_text = await fetch_document(f"https://www.sec.gov/Archives/{file_name.replace('.txt', '-index.html')}")
+    if index_text is None:
         return None
+    return parse_filing_index(index_text)
+
+
+@router.get("/filing-content/items/{file_name:path}")
+async def get_filing_items(
+        request: Request,
+        file_name: str,
+        items: List[str] = Query(..., description="Items to extract, e.g. 1A or part_2__1A for 10-Q filings"),
+        db: Session = Depends(get_db)
+) -> Dict[str, Any] | None:
+    """
+    Return only the requested items of a filing, e.g. /filing-content/items/edgar/data/...txt?items=1A&items=7.
+
+    Only the requested items (and the items before them, which bound their sections) are extracted. The result is
+    stored as a partial extraction, so items requested later are added to it instead of extracting everything.
+    """
+    requested = list(dict.fromkeys(item.strip() for value in items for item in value.split(",") if item.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No items requested")
+
+    stored = await run_in_threadpool(load_extraction, db, file_name, True)
+    missing = [item for item in requested if stored is None or item_json_key(item) not in stored]
+    if not missing:
+        return select_items(stored, requested)
+
+    # Concurrent requests for the same items of a filing share one download and extraction
+    extracted = await filing_flights.run(
+        ("items", file_name, tuple(sorted(missing))), lambda: extract_filing(file_name, missing)
+    )
+    if extracted is None:
+        return None
+    return select_items({**(stored or {}), **extracted}, requested)
 
-    soup = BeautifulSoup(req.content, "lxml")
 
-    try:
-        filing_type_text = soup.find("div", id="formName").find("strong").get_text(strip=True)
-        filing_type = re.search(r"Form\s+(.+)", filing_type_text).group(1)
-    except (HTMLParseError, Exception):
+def select_items(content: Dict[str, Any], items: List[str]) -> Dict[str, Any]:
+    """
+    Return the filing metadata and the given items of an extraction.
+    """
+    selected = {key: content[key] for key in ("filing_date", "filename") if key in content}
+    for item in items:
+        selected[item_json_key(item)] = content.get(item_json_key(item), "")
+    return selected
+
+
+@router.get("/filing-content/{file_name:path}")
+async def get_filing(request: Request, file_name: str, db: Session = Depends(get_db)) -> Dict[str, Any] | None:
+    # Serve the stored extraction if this filing was already processed by the current extractor
+    stored = await run_in_threadpool(load_extraction, db, file_name)
+    if stored is not None:
+        return stored
+
+    # Concurrent requests for the same filing share one download and extraction
+    return await filing_flights.run(("extracted", file_name), lambda: extract_filing(file_name))
+
+
+async def extract_filing(file_name: str, items: Optional[List[str]] = None) -> Dict[str, Any] | None:
+    index_text = await fetch_document(f"https://www.sec.gov/Archives/{file_name.replace('.txt', '-index.html')}")
+    if index_text is None:
         return None
 
-    filing_date = None
-    for group in soup.find_all("div", class_="formGrouping"):
-        labels = group.find_all("div", class_="infoHead")
-        values = group.find_all("div", class_="info")
-        for label, value in zip(labels, values):
-            if label.get_text(strip=True) == "Filing Date":
-                filing_date = value.get_text(strip=True)
-                break
-        if filing_date:
-            break
+    metadata = parse_filing_index(index_text, EXTRACTED_FORM_TYPES)
+    if metadata is None:
+        return None
 
-    if filing_date is None:
+    if items is not None:
+        items_list = get_items_list(metadata["Type"], metadata["Date"])
+        if items_list is item_list_other:
+            raise HTTPException(status_code=400, detail=f"Items are not available for {metadata['Type']} filings")
+        unknown_items = [item for item in items if item not in items_list]
+        if unknown_items:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown items for {metadata['Type']} filings: {', '.join(unknown_items)}"
+            )
+
+    document_text = await fetch_document(metadata["filename"])
+    if document_text is None:
         return None
 
-    all_tables = soup.find_all("table")
-    filing_types = ["10-K", "10-Q", "8-K"]
-
-    for table in all_tables:
-        if table.attrs.get("summary") == "Document Format Files":
-            htm_file_link, complete_text_file_link, link_to_download = None, None, None
-
-            for tr in table.find_all("tr")[1:]:
-                if tr.contents[7].text in filing_types:
-                    if tr.contents[5].contents[0].attrs["href"].split(".")[-1] in ["htm", "html"]:
-                        htm_file_link = "https://www.sec.gov" + tr.contents[5].contents[0].attrs["href"]
-                        break
-                elif tr.contents[3].text == "Complete submission text file":
-                    complete_text_file_link = "https://www.sec.gov" + tr.contents[5].contents[0].attrs["href"]
-                    break
-
-            if htm_file_link:
-                link_to_download = htm_file_link.replace("ix?doc=/",
-                                                         "") if "ix?doc=/" in htm_file_link else htm_file_link
-            elif complete_text_file_link:
-                link_to_download = complete_text_file_link
-
-            if link_to_download:
-                try:
-                    retries_exceeded = True
-                    for _ in range(5):
-                        session = requests.Session()
-                        req = requests_retry_session(
-                            retries=5, backoff_factor=0.2, session=session
-                        ).get(url=link_to_download, headers={"User-agent": USER_AGENT})
-
-                        if "will be managed until action is taken to declare your traffic." not in req.text:
-                            retries_exceeded = False
-                            break
-
-                    if retries_exceeded:
-                        print(f'Retries exceeded, could not download "{link_to_download}')
-                        return None
-
-                    metadata = {
-                        "Type": filing_type,
-                        "Date": filing_date,
-                        "filename": link_to_download
-                    }
-                    return ExtractItems(metadata, req.text).get_json()
-
-                except (RequestException, HTTPError, ConnectionError, Timeout, RetryError) as err:
-                    print(f"Request for {link_to_download} failed due to network-related error: {err}")
-                    return None
-            return None
-    return None
+    # Extraction is CPU-bound, run it in the extraction process pool
+    try:
+        extracted = await extraction_pool.extract(metadata, document_text, items)
+    except ExtractionQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many filings are being processed, please try again shortly",
+            headers={"Retry-After": "10"}
+        )
+    except ExtractionTimeout:
+        raise HTTPException(status_code=504, detail="Processing the filing took too long")
+    except ExtractionError as e:
+        raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
+    await run_in_threadpool(store_extraction, file_name, extracted, items is None)
+    return extracted
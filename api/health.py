@@ -1,9 +1,52 @@
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+from db import get_db
+from deps import verify_cron_token
 from models import HealthCheck
+from sec_cache import document_cache
+from sec_rate import sec_governor
+from sec_client import connection_stats
+from extraction_pool import extraction_pool
+from single_flight import filing_flights
+from sync_validators import validator_stats
 
 router = APIRouter(tags=["health"])
 
+# The internal counters below are for operators only, they need the cron token like the /cron endpoints
+operator_only = [Depends(verify_cron_token)]
+
 
 @router.get("/health", response_model=HealthCheck)
 def get_health() -> HealthCheck:
     return HealthCheck(status="OK")
+
+
+@router.get("/health/sec-cache", dependencies=operator_only)
+def get_sec_cache_stats() -> dict:
+    return document_cache.stats()
+
+
+@router.get("/health/sec-rate", dependencies=operator_only)
+def get_sec_rate_stats() -> dict:
+    return sec_governor.stats()
+
+
+@router.get("/health/sec-connections", dependencies=operator_only)
+def get_sec_connection_stats() -> dict:
+    return connection_stats()
+
+
+@router.get("/health/extraction-pool", dependencies=operator_only)
+def get_extraction_pool_stats() -> dict:
+    return extraction_pool.stats()
+
+
+@router.get("/health/single-flight", dependencies=operator_only)
+def get_single_flight_stats() -> dict:
+    return filing_flights.stats()
+
+
+@router.get("/health/sec-sync", dependencies=operator_only)
+def get_sec_sync_stats(db: Session = Depends(get_db)) -> list:
+    # Runs of the sync jobs per downloaded URL, including how many were skipped on 304 Not Modified
+    return validator_stats(db)
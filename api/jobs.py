@@ -0,0 +1,228 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
+from config import JOB_WORKERS
+from db import SessionLocal
+from models import Job
+
+ACTIVE_STATUSES = ("queued", "running")
+# Every process refreshes the heartbeat of its queued and running jobs this often
+JOB_HEARTBEAT_SECONDS = 30
+# Jobs without a heartbeat for this long belong to a process that is gone
+JOB_STALE_SECONDS = 4 * JOB_HEARTBEAT_SECONDS
+
+
+class JobRunner:
+    """
+    Runs long jobs (the cron syncs) in background threads, so the request that starts one returns right away.
+
+    Every job is a row in the jobs table holding its status, last reported progress, result and duration, so it
+    can be followed from any API process. Jobs wait in FIFO order for one of `workers` threads. Submitting a job
+    while one with the same name is still queued or running, in any process, returns the existing job instead; the
+    unique partial index ix_jobs_active_name enforces that in the database.
+
+    Several processes can share the jobs table. Every job records the process that runs it as its owner, and a
+    background thread refreshes the heartbeat of the process's active jobs every JOB_HEARTBEAT_SECONDS. Active jobs
+    whose heartbeat is older than JOB_STALE_SECONDS belonged to a process that died and are marked as failed, so a
+    restart or a second process never fails jobs that are still running elsewhere.
+
+    A job function is called with a database session of its own as `db`, a `progress` callback taking a dict, and
+    the params it was submitted with. A returned dict with "status": "error" marks the job as failed.
+
+    Attributes:
+        workers (int): Number of jobs running at the same time.
+        owner (str): Identifies this process in the jobs table; unique even when pids are reused, e.g. in containers.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def submit(self, name: str, func: Callable[..., Any], **params: Any) -> int:
+        """
+        Queue a job.
+
+        Args:
+            name (str): Name of the job, e.g. update-filings.
+            func (Callable[..., Any]): The job function.
+            **params (Any): Keyword arguments for the job function, stored with the job.
+
+        Returns:
+            int: The id of the job, or of the job with the same name that is already queued or running.
+        """
+        self._start_heartbeat()
+        db = SessionLocal()
+        try:
+            # A job of a dead process would block its name until the heartbeat thread gets to it
+            self._fail_stale(db)
+            active = db.query(Job).filter(Job.name == name, Job.status.in_(ACTIVE_STATUSES)).first()
+            if active is not None:
+                return active.id
+
+            now = datetime.utcnow()
+            job = Job(name=name, params=jsonable_encoder(params), status="queued", owner=self.owner,
+                      heartbeat_at=now)
+            db.add(job)
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another process queued the same job in the meantime
+                db.rollback()
+                active = db.query(Job).filter(Job.name == name, Job.status.in_(ACTIVE_STATUSES)).first()
+                if active is None:
+                    raise
+                return active.id
+            job_id = job.id
+        finally:
+            db.close()
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            self._executor.submit(self._run, job_id, func, params)
+        return job_id
+
+    def _run(self, job_id: int, func: Callable[..., Any], params: Dict[str, Any]) -> None:
+        self._update(job_id, status="running", started_at=datetime.utcnow())
+        print(f"Job {job_id} started")
+
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            result = func(db=db, progress=lambda progress: self._update(job_id, progress=progress), **params)
+        except Exception as e:
+            db.rollback()
+            print(f"Job {job_id} failed: {str(e)}")
+            self._update(job_id, status="failed", error=str(e) or type(e).__name__,
+                         finished_at=datetime.utcnow(), duration_seconds=round(time.perf_counter() - start, 2))
+            return
+        finally:
+            db.close()
+
+        failed = isinstance(result, dict) and result.get("status") == "error"
+        print(f"Job {job_id} {'failed' if failed else 'succeeded'}")
+        self._update(job_id, status="failed" if failed else "succeeded", result=result,
+                     finished_at=datetime.utcnow(), duration_seconds=round(time.perf_counter() - start, 2))
+
+    @staticmethod
+    def _update(job_id: int, **values: Any) -> None:
+        for key in ("progress", "result"):
+            if key in values:
+                # JSON columns cannot hold dates
+                values[key] = jsonable_encoder(values[key])
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == job_id).update(values)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Could not update job {job_id}: {str(e)}")
+        finally:
+            db.close()
+
+    def recover(self) -> int:
+        """
+        Mark the jobs of processes that stopped while they were queued or running as failed, and start the
+        heartbeat of this process. Called on application startup.
+
+        Returns:
+            int: Number of interrupted jobs.
+        """
+        self._start_heartbeat()
+        db = SessionLocal()
+        try:
+            return self._fail_stale(db)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _fail_stale(db) -> int:
+        now = datetime.utcnow()
+        stale = db.query(Job).filter(
+            Job.status.in_(ACTIVE_STATUSES),
+            (Job.heartbeat_at.is_(None)) | (Job.heartbeat_at < now - timedelta(seconds=JOB_STALE_SECONDS))
+        ).update(
+            {"status": "failed", "error": "Interrupted: the process running it stopped", "finished_at": now},
+            synchronize_session=False
+        )
+        db.commit()
+        return stale
+
+    def _start_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _beat(self) -> None:
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            db = SessionLocal()
+            try:
+                db.query(Job).filter(Job.owner == self.owner, Job.status.in_(ACTIVE_STATUSES)).update(
+                    {"heartbeat_at": datetime.utcnow()}, synchronize_session=False
+                )
+                db.commit()
+                interrupted = self._fail_stale(db)
+                if interrupted:
+                    print(f"Marked {interrupted} interrupted jobs as failed")
+            except Exception as e:
+                db.rollback()
+                print(f"Job heartbeat failed: {str(e)}")
+            finally:
+                db.close()
+
+    def close(self) -> None:
+        """
+        Stop starting queued jobs. Called on application shutdown; running jobs are left to finish and keep their
+        heartbeat until the process exits, the queued ones of this process are marked as failed.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.owner == self.owner, Job.status == "queued").update(
+                {"status": "failed", "error": "Cancelled by a shutdown", "finished_at": datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Could not cancel the queued jobs: {str(e)}")
+        finally:
+            db.close()
+
+
+def job_to_dict(job: Job) -> Dict[str, Any]:
+    """
+    Return the API representation of a job.
+    """
+    return {
+        "id": job.id,
+        "name": job.name,
+        "params": job.params,
+        "status": job.status,
+        "progress": job.progress,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "duration_seconds": job.duration_seconds,
+    }
+
+
+job_runner = JobRunner(JOB_WORKERS)
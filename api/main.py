@@ -6,6 +6,9 @@ from slowapi.errors import RateLimitExceeded
 from dotenv import load_dotenv
 import auth, subscription, tickers, filings, cron, filing_content, health
 from db import init_db
+from sec_client import close_async_client
+from extraction_pool import extraction_pool
+from jobs import job_runner
 import os
 
 from config import ALLOWED_ORIGINS
@@ -46,4 +49,13 @@ app.include_router(health.router, tags=["health"])
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    interrupted = job_runner.recover()
+    if interrupted:
+        print(f"Marked {interrupted} interrupted jobs as failed")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_async_client()
+    extraction_pool.close()
+    job_runner.close()
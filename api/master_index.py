@@ -0,0 +1,108 @@
+"""
+Description: Streaming parser for EDGAR master index files, shared by the cron sync and the seeding scripts.
+
+Handles the quarterly full-index/{year}/QTR{n}/master.idx (also straight from master.zip) and the daily
+daily-index/.../master.YYYYMMDD.idx. Records are yielded one at a time while the file is read, so memory use does
+not depend on the size of the quarter and the records can be fed into a bulk loader as they come.
+"""
+import itertools
+import zipfile
+from contextlib import contextmanager
+from datetime import date
+from typing import BinaryIO, Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+
+class FilingRecord(NamedTuple):
+    cik: str
+    company_name: str
+    form_type: str
+    date_filed: date
+    filename: str  # e.g. edgar/data/320193/0000320193-23-000106.txt
+
+
+def parse_date(value: bytes) -> date:
+    """
+    Parse the Date Filed field: YYYY-MM-DD in the quarterly files, YYYYMMDD in the daily ones.
+
+    Raises:
+        ValueError: If the field is not a valid date in either format.
+    """
+    if len(value) == 8:
+        return date(int(value[:4]), int(value[4:6]), int(value[6:]))
+    return date.fromisoformat(value.decode("ascii"))
+
+
+def iter_master_idx(f: Iterable[bytes], on_malformed: Optional[Callable[[bytes], None]] = None) -> Iterator[FilingRecord]:
+    """
+    Parse a master index line by line.
+
+    Args:
+        f (Iterable[bytes]): The index, e.g. a file opened in binary mode.
+        on_malformed (Optional[Callable[[bytes], None]]): Called with every line after the header that is not a
+            valid filing (wrong number of fields, invalid date). Such lines are skipped either way.
+
+    Yields:
+        FilingRecord: Every filing of the index, in file order.
+    """
+    lines = iter(f)
+    # The header ends with a dashed line
+    for line in lines:
+        if line.startswith(b"---"):
+            break
+
+    for line in lines:
+        fields = line.rstrip(b"\r\n").split(b"|")
+        if len(fields) != 5:
+            if on_malformed is not None and line.strip():
+                on_malformed(line)
+            continue
+        try:
+            date_filed = parse_date(fields[3].strip())
+        except (ValueError, UnicodeDecodeError):
+            if on_malformed is not None:
+                on_malformed(line)
+            continue
+        # EDGAR writes the index in latin-1
+        yield FilingRecord(
+            fields[0].strip().decode("latin-1"),
+            fields[1].strip().decode("latin-1"),
+            fields[2].strip().decode("latin-1"),
+            date_filed,
+            fields[4].strip().decode("latin-1"),
+        )
+
+
+@contextmanager
+def open_master_idx(path: str) -> Iterator[BinaryIO]:
+    """
+    Open a master.idx, or the master.idx inside a master.zip, for reading in binary mode.
+
+    Args:
+        path (str): Path of a .idx or .zip file.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf, zf.open("master.idx") as f:
+            yield f
+    else:
+        with open(path, "rb") as f:
+            yield f
+
+
+def read_master_idx(path: str, on_malformed: Optional[Callable[[bytes], None]] = None) -> Iterator[FilingRecord]:
+    """
+    Yield the filings of a master.idx or master.zip file, see iter_master_idx.
+    """
+    with open_master_idx(path) as f:
+        yield from iter_master_idx(f, on_malformed)
+
+
+def batched(records: Iterable[FilingRecord], size: int) -> Iterator[List[FilingRecord]]:
+    """
+    Group records into lists of at most `size`, e.g. one list per INSERT statement.
+    """
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, size))
+        if not batch:
+            return
+        yield batch
@@ -1,18 +1,16 @@
 import os
-import itertools
+import sys
 from collections import Counter
+from pathlib import Path
 
-MASTER_DIR = "masterdatadownload"  # or full path if needed
+# Add the api directory to the Python path
+api_dir = str(Path(__file__).resolve().parent.parent)
+if api_dir not in sys.path:
+    sys.path.append(api_dir)
 
+from master_index import read_master_idx
 
-def parse_master_idx(file_path):
-    with open(file_path, "rb") as f:
-        lines = [
-            line.decode("latin-1").strip()
-            for line in itertools.islice(f, 11, None)
-            if "|" in line.decode("latin-1")
-        ]
-        return [line.split("|")[4] for line in lines]  # txt_filename is the 5th field
+MASTER_DIR = "masterdatadownload"  # or full path if needed
 
 
 def collect_all_filenames():
@@ -23,8 +21,7 @@ def collect_all_filenames():
             if file == "master.idx":
                 idx_path = os.path.join(root, file)
                 try:
-                    filenames = parse_master_idx(idx_path)
-                    all_filenames.extend(filenames)
+                    all_filenames.extend(record.filename for record in read_master_idx(idx_path))
                 except Exception as e:
                     print(f"⚠️ Failed to read {idx_path}: {e}")
 
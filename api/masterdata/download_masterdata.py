@@ -1,43 +1,224 @@
+"""
+Description: Downloads the quarterly EDGAR master index (full-index/{year}/QTR{n}/master.zip) from 1993 Q1 up to the
+current quarter and extracts every master.idx to masterdatadownload/{year}_QTR{n}/master.idx.
+
+The download is resumable: every finished quarter is recorded in masterdatadownload/manifest.json together with the
+SHA-256 of its master.idx, and quarters that are recorded and still on disk are skipped on the next run. A quarter
+only stops changing once it has ended, so an entry is final ("closed") only if it was downloaded or checked after the
+end of its quarter; other recorded quarters (the current one, and the previous one right after the rollover) are
+checked with a conditional request using the ETag of the previous download. Several quarters are downloaded at a time; every request still goes through the shared SEC
+rate governor. The zip is streamed to disk and master.idx is extracted from it without loading it into memory.
+
+Usage (from the api directory):
+    python masterdata/download_masterdata.py
+    python masterdata/download_masterdata.py --workers 8 --verify
+"""
+import argparse
+import hashlib
+import json
 import os
+import shutil
+import sys
+import tempfile
+import threading
 import time
 import zipfile
-import requests
-from datetime import datetime
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add the api directory to the Python path
+api_dir = str(Path(__file__).resolve().parent.parent)
+if api_dir not in sys.path:
+    sys.path.append(api_dir)
+
+from sec_client import get_sync_session, SEC_THROTTLE_MESSAGE
 
 # Constants
 BASE_URL = "https://www.sec.gov/Archives/edgar/full-index"
 DEST_FOLDER = "masterdatadownload"
-HEADERS = {
-    "User-Agent": "Lekabros (lekabros@gmail.com)"
-}
-RATE_LIMIT_DELAY = 0.11  # 10 requests per second
-
-# Create local destination folder
-os.makedirs(DEST_FOLDER, exist_ok=True)
-
-# Determine current quarter and year
-now = datetime.utcnow()
-current_year = now.year
-current_quarter = (now.month - 1) // 3 + 1
-
-# Download all master.zip files from 1993 Q1 to latest
-for year in range(1993, current_year + 1):
-    for quarter in range(1, 5):
-        if year == current_year and quarter > current_quarter:
-            break  # Stop at current quarter
-        url = f"{BASE_URL}/{year}/QTR{quarter}/master.zip"
-        local_folder = os.path.join(DEST_FOLDER, f"{year}_QTR{quarter}")
-        os.makedirs(local_folder, exist_ok=True)
-        print(f"Fetching: {url}")
+MANIFEST_FILE = "manifest.json"
+CHUNK_SIZE = 1024 * 1024
+
+
+def list_quarters(first_year: int) -> List[Tuple[int, int]]:
+    """Return (year, quarter) from first_year Q1 up to the current quarter."""
+    now = datetime.utcnow()
+    current_quarter = (now.month - 1) // 3 + 1
+    return [
+        (year, quarter)
+        for year in range(first_year, now.year + 1)
+        for quarter in range(1, 5)
+        if not (year == now.year and quarter > current_quarter)
+    ]
+
+
+def quarter_end(year: int, quarter: int) -> date:
+    """Return the first day after a quarter."""
+    return date(year + 1, 1, 1) if quarter == 4 else date(year, 3 * quarter + 1, 1)
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    The completed quarters, written to disk after every change so an interrupted run loses nothing.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
         try:
-            response = requests.get(url, headers=HEADERS, timeout=10)
-            if response.status_code == 200:
-                with zipfile.ZipFile(BytesIO(response.content)) as zf:
-                    zf.extractall(local_folder)
-                print(f"✅ Extracted to: {local_folder}")
-            else:
-                print(f"❌ Failed to fetch {url} (status code {response.status_code})")
-        except Exception as e:
-            print(f"❌ Error fetching {url}: {str(e)}")
-        time.sleep(RATE_LIMIT_DELAY)
+            with open(path) as f:
+                self.quarters: Dict[str, Dict[str, Any]] = json.load(f)
+        except FileNotFoundError:
+            self.quarters = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.quarters.get(key)
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.quarters[key] = entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.quarters, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def is_complete(entry: Optional[Dict[str, Any]], idx_path: str, verify: bool) -> bool:
+    """Check that a quarter recorded in the manifest is still on disk (and unchanged, with verify)."""
+    if entry is None or not os.path.exists(idx_path):
+        return False
+    if os.path.getsize(idx_path) != entry["idx_bytes"]:
+        return False
+    return not verify or sha256_file(idx_path) == entry["idx_sha256"]
+
+
+def download_quarter(year: int, quarter: int, dest: str, manifest: Manifest, verify: bool) -> str:
+    """
+    Download and extract the master.idx of one quarter unless it is already complete and closed.
+
+    Args:
+        year (int): Year of the quarter.
+        quarter (int): Quarter number, 1 to 4.
+        dest (str): Destination folder.
+        manifest (Manifest): The completed quarters.
+        verify (bool): Re-hash quarters that are already on disk.
+
+    Returns:
+        str: What happened: "skipped", "not modified", "downloaded" or "failed: ...".
+    """
+    key = f"{year}_QTR{quarter}"
+    url = f"{BASE_URL}/{year}/QTR{quarter}/master.zip"
+    local_folder = os.path.join(dest, key)
+    idx_path = os.path.join(local_folder, "master.idx")
+
+    entry = manifest.get(key)
+    complete = is_complete(entry, idx_path, verify)
+    if complete and entry.get("closed"):
+        return "skipped"
+    # Checked now, the index can still have grown until the end of the quarter
+    closed = datetime.utcnow().date() >= quarter_end(year, quarter)
+
+    headers = {}
+    if complete and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+
+    os.makedirs(local_folder, exist_ok=True)
+    session = get_sync_session()
+    zip_fd, zip_path = tempfile.mkstemp(dir=local_folder, suffix=".zip.tmp")
+    idx_tmp_path = None
+    try:
+        with session.get(url, headers=headers, timeout=30, stream=True) as response:
+            if response.status_code == 304:
+                if closed:
+                    manifest.set(key, {**entry, "closed": True, "checked_at": datetime.utcnow().isoformat()})
+                return "not modified"
+            if response.status_code != 200:
+                return f"failed: status code {response.status_code}"
+
+            zip_digest = hashlib.sha256()
+            with os.fdopen(zip_fd, "wb") as f:
+                zip_fd = None
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    zip_digest.update(chunk)
+                    f.write(chunk)
+            etag = response.headers.get("ETag")
+
+        if not zipfile.is_zipfile(zip_path):
+            with open(zip_path, "rb") as f:
+                head = f.read(4096).decode("latin-1")
+            return "failed: throttled by the SEC" if SEC_THROTTLE_MESSAGE in head else "failed: not a zip file"
+
+        # Extract next to the final file and move it into place, so a crash never leaves a partial master.idx
+        with zipfile.ZipFile(zip_path) as zf, zf.open("master.idx") as src:
+            idx_fd, idx_tmp_path = tempfile.mkstemp(dir=local_folder, suffix=".idx.tmp")
+            with os.fdopen(idx_fd, "wb") as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        os.replace(idx_tmp_path, idx_path)
+
+        manifest.set(key, {
+            "url": url,
+            "etag": etag,
+            "zip_sha256": zip_digest.hexdigest(),
+            "idx_sha256": sha256_file(idx_path),
+            "idx_bytes": os.path.getsize(idx_path),
+            "downloaded_at": datetime.utcnow().isoformat(),
+            "closed": closed,
+        })
+        return "downloaded"
+    except Exception as e:
+        return f"failed: {str(e)}"
+    finally:
+        if zip_fd is not None:
+            os.close(zip_fd)
+        for tmp_path in (zip_path, idx_tmp_path):
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dest", default=DEST_FOLDER, help="Destination folder")
+    parser.add_argument("--workers", type=int, default=4, help="Quarters downloaded at the same time")
+    parser.add_argument("--from-year", type=int, default=1993, help="First year to download")
+    parser.add_argument("--verify", action="store_true", help="Re-hash the quarters that are already on disk")
+    args = parser.parse_args()
+
+    os.makedirs(args.dest, exist_ok=True)
+    manifest = Manifest(os.path.join(args.dest, MANIFEST_FILE))
+    quarters = list_quarters(args.from_year)
+
+    start = time.perf_counter()
+    outcomes: Dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(
+                download_quarter, year, quarter, args.dest, manifest, args.verify
+            ): (year, quarter)
+            for year, quarter in quarters
+        }
+        for future in as_completed(futures):
+            year, quarter = futures[future]
+            outcome = future.result()
+            outcomes[outcome.split(":")[0]] = outcomes.get(outcome.split(":")[0], 0) + 1
+            if outcome != "skipped":
+                print(f"{year}_QTR{quarter}: {outcome}")
+
+    summary = ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items()))
+    print(f"{len(quarters)} quarters in {time.perf_counter() - start:.1f}s: {summary}")
+    if outcomes.get("failed"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
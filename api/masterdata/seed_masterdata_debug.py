@@ -1,6 +1,10 @@
+import argparse
 import os
+import sys
+import time
 import psycopg2
-import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
 from urllib.parse import urlparse
 from psycopg2.extras import execute_values
 from tqdm import tqdm
@@ -8,25 +12,22 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Add the api directory to the Python path
+api_dir = str(Path(__file__).resolve().parent.parent)
+if api_dir not in sys.path:
+    sys.path.append(api_dir)
+
+from master_index import batched, read_master_idx
+from seed_checkpoints import is_seeded, load_checkpoints, quarter_of, record_checkpoint
+
 MASTER_DIR = "masterdatadownload"
+CHECKPOINT_TARGET = "edgar_filings"
+BATCH_SIZE = 1000  # Safe starting point for your VPS
 db_url = os.getenv("DATABASE_URL")
 
 if not db_url:
     raise RuntimeError("Missing DATABASE_URL env var.")
 
-def parse_master_idx(file_path):
-    with open(file_path, "rb") as f:
-        lines = [
-            line.decode("latin-1").strip()
-            for line in itertools.islice(f, 11, None)  # start after dashed line
-            if "|" in line.decode("latin-1")
-        ]
-        results = []
-        for line in lines:
-            cik, name, form, date, txt = line.split("|")
-            results.append((cik, name, form, date, txt))
-        return results
-
 def connect_db():
     parsed = urlparse(db_url)
     conn = psycopg2.connect(
@@ -53,23 +54,40 @@ def create_table_if_not_exists(conn):
         """)
     conn.commit()
 
-def quarter_already_seeded(cur, quarter):
-    cur.execute("""
-        SELECT COUNT(*) FROM edgar_filings
-        WHERE quarter = %s;
-    """, (quarter,))
-    count = cur.fetchone()[0]
-    return count > 0
+def seed_quarter(idx_file):
+    """Insert one quarter into edgar_filings on a connection of its own and checkpoint it in the same transaction."""
+    quarter = quarter_of(idx_file)  # e.g., "1993_QTR1"
+    start = time.perf_counter()
+    idx_bytes = os.path.getsize(idx_file)
+    read = inserted = 0
 
-def seed_to_db():
     conn = connect_db()
-    create_table_if_not_exists(conn)
-    cur = conn.cursor()
+    try:
+        with conn.cursor() as cur:
+            for batch in batched(read_master_idx(idx_file), BATCH_SIZE):
+                values = [(*record, quarter) for record in batch]
+                inserted += len(execute_values(cur, """
+                    INSERT INTO edgar_filings (cik, company_name, form_type, date_filed, txt_filename, quarter)
+                    VALUES %s
+                    ON CONFLICT (txt_filename) DO NOTHING
+                    RETURNING 1;
+                """, values, page_size=BATCH_SIZE, fetch=True))
+                read += len(batch)
+            record_checkpoint(cur, CHECKPOINT_TARGET, quarter, idx_bytes, read, inserted, time.perf_counter() - start)
+        conn.commit()
+    finally:
+        conn.close()
+    return quarter, read, inserted
 
-    BATCH_SIZE = 1000  # Safe starting point for your VPS
+def seed_to_db(workers=4):
+    conn = connect_db()
+    create_table_if_not_exists(conn)
+    with conn.cursor() as cur:
+        checkpoints = load_checkpoints(cur, CHECKPOINT_TARGET)
+    conn.close()
 
-    folders = sorted(os.listdir(MASTER_DIR))
-    for folder in folders:
+    idx_files = []
+    for folder in sorted(os.listdir(MASTER_DIR)):
         folder_path = os.path.join(MASTER_DIR, folder)
         if not os.path.isdir(folder_path):
             continue
@@ -79,33 +97,24 @@ def seed_to_db():
             print(f"⚠️  Skipping {folder} (no master.idx)")
             continue
 
-        quarter = folder  # e.g., "1993_QTR1"
-        if quarter_already_seeded(cur, quarter):
-            print(f"⏭️  Skipping {quarter} (already seeded)")
+        if is_seeded(checkpoints, idx_file):
+            print(f"⏭️  Skipping {folder} (already seeded)")
             continue
+        idx_files.append(idx_file)
 
-        filings = parse_master_idx(idx_file)
-        print(f"📄 Seeding {quarter} with {len(filings)} filings...")
-
-        for i in tqdm(range(0, len(filings), BATCH_SIZE), desc=f"Inserting {quarter}"):
-            batch = filings[i:i+BATCH_SIZE]
-            values = [(cik, name, form, date, txt, quarter) for cik, name, form, date, txt in batch]
-
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(seed_quarter, idx_file): idx_file for idx_file in idx_files}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Seeding quarters"):
             try:
-                execute_values(cur, """
-                    INSERT INTO edgar_filings (cik, company_name, form_type, date_filed, txt_filename, quarter)
-                    VALUES %s
-                    ON CONFLICT (txt_filename) DO NOTHING;
-                """, values)
+                quarter, read, inserted = future.result()
             except Exception as e:
-                print(f"❌ Batch insert error in {quarter} (batch {i}-{i+len(batch)}): {e}")
-
-        conn.commit()
-        print(f"✅ Finished seeding {quarter}")
+                tqdm.write(f"❌ Error seeding {quarter_of(futures[future])}: {e}")
+                continue
+            tqdm.write(f"✅ Finished seeding {quarter} ({read} read, {inserted} inserted)")
 
-    cur.close()
-    conn.close()
     print("🎉 All done!")
 
 if __name__ == "__main__":
-    seed_to_db()
+    parser = argparse.ArgumentParser(description="Seed edgar_filings from the downloaded master.idx files.")
+    parser.add_argument("--workers", type=int, default=4, help="Quarters seeded at the same time")
+    seed_to_db(parser.parse_args().workers)
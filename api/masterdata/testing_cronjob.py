@@ -1,8 +1,6 @@
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 from datetime import datetime
-from requests.adapters import HTTPAdapter
-from urllib3.util import Retry
 from psycopg2.extras import execute_values
 from tqdm import tqdm
 import os
@@ -11,6 +9,16 @@ import tempfile
 import zipfile
 import requests
 import itertools
+import sys
+from pathlib import Path
+
+# Add the api directory to the Python path
+api_dir = str(Path(__file__).resolve().parent.parent)
+if api_dir not in sys.path:
+    sys.path.append(api_dir)
+
+from retry import requests_retry_session
+from sec_rate import sec_governor
 
 load_dotenv()
 
@@ -50,7 +58,7 @@ def main():
                 print(f"🔁 Attempt {attempt + 1} to download...")
                 session = requests.Session()
                 req = requests_retry_session(
-                    retries=5, backoff_factor=0.2, session=session
+                    retries=5, backoff_factor=0.2, session=session, rate_governor=sec_governor
                 ).get(url=url, headers={"User-agent": USER_AGENT})
 
                 if "will be managed until action is taken to declare your traffic." not in req.text:
@@ -101,28 +109,5 @@ def main():
         raise e
 
 
-def requests_retry_session(
-        retries: int = 5,
-        backoff_factor: float = 0.5,
-        status_forcelist: tuple = (400, 401, 403, 500, 502, 503, 504, 505),
-        session: requests.Session = None,
-) -> requests.Session:
-    session = session or requests.Session()
-
-    retry = Retry(
-        total=retries,
-        read=retries,
-        connect=retries,
-        backoff_factor=backoff_factor,
-        status_forcelist=status_forcelist,
-    )
-
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-
-    return session
-
-
 if __name__ == "__main__":
     main()
@@ -53,6 +53,14 @@ target_metadata = Base.metadata
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
 
+# Indexes that only exist in migrations, not in the models (see Ticker in models.py)
+MIGRATION_ONLY_INDEXES = {"ix_tickers_name_trgm", "ix_tickers_symbol_trgm"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Keep autogenerate from dropping the migration-only indexes
+    return not (type_ == "index" and name in MIGRATION_ONLY_INDEXES)
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -70,6 +78,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -93,7 +102,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata, include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,35 @@
+"""add unique filing url index
+
+Revision ID: 8d4b7e2a1f36
+Revises: 5e1f0a9c2d84
+Create Date: 2026-10-18 15:21:09.662410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4b7e2a1f36'
+down_revision: Union[str, None] = '5e1f0a9c2d84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Seeding the same quarter twice inserted its filings twice; keep the oldest row of every filing
+    op.execute("""
+        DELETE FROM filings a
+        USING filings b
+        WHERE a.filing_url = b.filing_url
+          AND a.id > b.id
+    """)
+    op.create_index(op.f('ix_filings_filing_url'), 'filings', ['filing_url'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_filings_filing_url'), table_name='filings')
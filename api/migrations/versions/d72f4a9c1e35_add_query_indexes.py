@@ -0,0 +1,46 @@
+"""add query indexes
+
+Revision ID: d72f4a9c1e35
+Revises: b51d7c3e8f26
+Create Date: 2026-10-18 20:41:33.906512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd72f4a9c1e35'
+down_revision: Union[str, None] = 'b51d7c3e8f26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The unique ix_filings_filing_url already exists, see 8d4b7e2a1f36
+    op.create_index('ix_filings_ticker_id_filing_date', 'filings', ['ticker_id', sa.text('filing_date DESC')], unique=False)
+
+    # Dropped as a unique index in f67eb51ece63; symbols are not unique across the EDGAR ticker list
+    op.create_index(op.f('ix_tickers_symbol'), 'tickers', ['symbol'], unique=False)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_tickers_name_trgm', 'tickers', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_tickers_symbol_trgm', 'tickers', ['symbol'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'symbol': 'gin_trgm_ops'})
+
+    op.create_index(op.f('ix_users_verification_token'), 'users', ['verification_token'], unique=False)
+    op.create_index(op.f('ix_users_reset_password_token'), 'users', ['reset_password_token'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # pg_trgm is left installed, dropping an extension needs more privileges than creating it with IF NOT EXISTS
+    op.drop_index(op.f('ix_users_reset_password_token'), table_name='users')
+    op.drop_index(op.f('ix_users_verification_token'), table_name='users')
+    op.drop_index('ix_tickers_symbol_trgm', table_name='tickers')
+    op.drop_index('ix_tickers_name_trgm', table_name='tickers')
+    op.drop_index(op.f('ix_tickers_symbol'), table_name='tickers')
+    op.drop_index('ix_filings_ticker_id_filing_date', table_name='filings')
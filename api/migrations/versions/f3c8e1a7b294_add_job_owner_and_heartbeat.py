@@ -0,0 +1,39 @@
+"""add job owner and heartbeat
+
+Revision ID: f3c8e1a7b294
+Revises: d72f4a9c1e35
+Create Date: 2026-10-18 22:06:45.117302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8e1a7b294'
+down_revision: Union[str, None] = 'd72f4a9c1e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('owner', sa.String(), nullable=True))
+    op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    # Active jobs from before the upgrade have no owner to keep them alive, and could hold duplicate names
+    op.execute("""
+        UPDATE jobs
+        SET status = 'failed', error = 'Interrupted by an upgrade', finished_at = NOW()
+        WHERE status IN ('queued', 'running')
+    """)
+    op.create_index('ix_jobs_active_name', 'jobs', ['name'], unique=True,
+                    postgresql_where=sa.text("status IN ('queued', 'running')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_active_name', table_name='jobs', postgresql_where=sa.text("status IN ('queued', 'running')"))
+    op.drop_column('jobs', 'heartbeat_at')
+    op.drop_column('jobs', 'owner')
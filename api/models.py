@@ -1,11 +1,11 @@
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, JSON, Float, Text, Date
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, JSON, Float, Text, Date, LargeBinary, Index
 from sqlalchemy.orm import relationship
 import enum
 from pydantic import BaseModel, EmailStr, Field, validator
 from datetime import datetime
 from db import Base
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import re
 
 # Enums
@@ -32,8 +32,8 @@ class User(Base):
     subscription_tier = Column(Enum(SubscriptionTier), default=SubscriptionTier.FREE)
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
-    verification_token = Column(String, nullable=True)
-    reset_password_token = Column(String, nullable=True)
+    verification_token = Column(String, nullable=True, index=True)
+    reset_password_token = Column(String, nullable=True, index=True)
     last_verification_email_sent = Column(DateTime, nullable=True)
     is_superuser = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -78,7 +78,7 @@ class Ticker(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     cik = Column(String, unique=True, index=True)
-    symbol = Column(String)
+    symbol = Column(String, index=True)
     name = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -86,6 +86,9 @@ class Ticker(Base):
     # Relationship with filings
     filings = relationship("Filing", back_populates="ticker")
 
+    # The pg_trgm indexes ix_tickers_name_trgm and ix_tickers_symbol_trgm used by /tickers/search are created by
+    # migration d72f4a9c1e35 only: they need the pg_trgm extension, which init_db's create_all cannot rely on
+
 class Filing(Base):
     __tablename__ = "filings"
 
@@ -93,7 +96,7 @@ class Filing(Base):
     ticker_id = Column(Integer, ForeignKey("tickers.id"))
     filing_type = Column(String)
     filing_date = Column(DateTime)
-    filing_url = Column(String)
+    filing_url = Column(String, unique=True, index=True)  # EDGAR path of the submission, e.g. edgar/data/320193/0000320193-23-000106.txt
     filing_metadata = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -101,6 +104,77 @@ class Filing(Base):
     # Relationship with ticker
     ticker = relationship("Ticker", back_populates="filings")
 
+    __table_args__ = (
+        # The filings of a ticker, newest first (/filings/by-cik)
+        Index("ix_filings_ticker_id_filing_date", ticker_id, filing_date.desc()),
+    )
+
+class FilingExtraction(Base):
+    __tablename__ = "filing_extractions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_name = Column(String, unique=True, index=True)  # EDGAR path as passed to /filing-content, e.g. edgar/data/320193/0000320193-23-000106.txt
+    extractor_version = Column(String, nullable=False)  # Fingerprint of the extraction code that produced the content
+    content = Column(LargeBinary, nullable=False)  # zlib-compressed JSON returned by ExtractItems.get_json()
+    complete = Column(Boolean, nullable=False, default=True, server_default="true")  # False if only some items were extracted so far
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class FilingIndexDay(Base):
+    __tablename__ = "filing_index_days"
+
+    day = Column(Date, primary_key=True)  # Date of an EDGAR daily index (daily-index/.../master.YYYYMMDD.idx)
+    published = Column(Boolean, nullable=False)  # False for weekends and holidays, which have no daily index
+    filings_read = Column(Integer, nullable=False, default=0)
+    filings_inserted = Column(Integer, nullable=False, default=0)
+    processed_at = Column(DateTime, default=datetime.utcnow)
+
+class SyncValidator(Base):
+    __tablename__ = "sync_validators"
+
+    url = Column(String, primary_key=True)  # SEC URL downloaded by a sync job, e.g. company_tickers.json
+    etag = Column(String, nullable=True)  # ETag of the last processed download
+    last_modified = Column(String, nullable=True)  # Last-Modified of the last processed download
+    runs = Column(Integer, nullable=False, default=0)
+    not_modified = Column(Integer, nullable=False, default=0)  # Runs skipped because SEC answered 304 Not Modified
+    checked_at = Column(DateTime, default=datetime.utcnow)
+    changed_at = Column(DateTime, nullable=True)  # When a changed document was last processed
+
+class SeedCheckpoint(Base):
+    __tablename__ = "seed_checkpoints"
+
+    target = Column(String, primary_key=True)  # Table the quarter was seeded into, e.g. filings
+    quarter = Column(String, primary_key=True)  # Quarter folder of the master.idx, e.g. 1993_QTR1
+    idx_bytes = Column(Integer, nullable=False)  # Size of the master.idx when it was seeded; the current quarter grows
+    rows_read = Column(Integer, nullable=False, default=0)
+    rows_inserted = Column(Integer, nullable=False, default=0)
+    seconds = Column(Float, nullable=True)
+    completed_at = Column(DateTime, default=datetime.utcnow)
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, index=True)  # e.g. update-filings
+    params = Column(JSON, nullable=True)
+    status = Column(String, nullable=False, index=True)  # queued, running, succeeded or failed
+    progress = Column(JSON, nullable=True)  # Last progress reported by the job
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    owner = Column(String, nullable=True)  # Process that queued and runs the job, hostname:pid:random
+    heartbeat_at = Column(DateTime, nullable=True)  # Refreshed by the owner while the job is queued or running
+
+    __table_args__ = (
+        # At most one queued or running job per name, across all processes
+        Index("ix_jobs_active_name", name, unique=True,
+              postgresql_where=text("status IN ('queued', 'running')"),
+              sqlite_where=text("status IN ('queued', 'running')")),
+    )
+
 # Pydantic Models for API
 class UserBase(BaseModel):
     email: EmailStr
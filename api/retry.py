@@ -1,6 +1,112 @@
+import threading
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 from urllib3.util import Retry
+from sec_rate import TokenBucket
+
+
+class ConnectionStats:
+    """
+    Thread-safe counters of requests sent and connections opened, to measure connection reuse.
+
+    Attributes:
+        requests (int): Number of requests sent.
+        new_connections (int): Number of new TCP (+TLS) connections opened for them.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self) -> None:
+        with self._lock:
+            self.new_connections += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reuse_rate": round(reused / self.requests, 3) if self.requests else None,
+            }
+
+
+def counting_pool_class(pool_class: type, stats: ConnectionStats) -> type:
+    """
+    Return a subclass of a urllib3 connection pool that records every TCP connect in stats.
+    urllib3 keeps connection objects around and reconnects them when the server closed the socket,
+    so the connect() calls are counted rather than the connection objects.
+    """
+
+    class CountingConnectionPool(pool_class):
+        def _new_conn(self):
+            conn = super()._new_conn()
+            connect = conn.connect
+
+            def counting_connect(*args, **kwargs):
+                stats.record_connection()
+                return connect(*args, **kwargs)
+
+            conn.connect = counting_connect
+            return conn
+
+    return CountingConnectionPool
+
+
+class GovernedRetry(Retry):
+    """
+    Retry policy that takes a token from a rate governor before every retry attempt,
+    so retries done inside urllib3 count against the same allowance as first attempts.
+    """
+
+    def __init__(self, *args, rate_governor: TokenBucket = None, **kwargs) -> None:
+        self.rate_governor = rate_governor
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kwargs) -> "GovernedRetry":
+        # urllib3 creates a new Retry object after every attempt; carry the governor over
+        retry = super().new(**kwargs)
+        retry.rate_governor = self.rate_governor
+        return retry
+
+    def sleep(self, response=None) -> None:
+        super().sleep(response)
+        if self.rate_governor:
+            self.rate_governor.acquire()
+
+
+class GovernedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that takes a token from a rate governor before sending each request and
+    optionally counts requests and newly opened connections in a ConnectionStats.
+    """
+
+    def __init__(self, rate_governor: TokenBucket = None, connection_stats: ConnectionStats = None, **kwargs) -> None:
+        self.rate_governor = rate_governor
+        self.connection_stats = connection_stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        if self.connection_stats:
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": counting_pool_class(HTTPConnectionPool, self.connection_stats),
+                "https": counting_pool_class(HTTPSConnectionPool, self.connection_stats),
+            }
+
+    def send(self, request, **kwargs):
+        if self.rate_governor:
+            self.rate_governor.acquire()
+        if self.connection_stats:
+            self.connection_stats.record_request()
+        return super().send(request, **kwargs)
 
 
 def requests_retry_session(
@@ -8,16 +114,25 @@ def requests_retry_session(
         backoff_factor: float = 0.5,
         status_forcelist: tuple = (400, 401, 403, 500, 502, 503, 504, 505),
         session: requests.Session = None,
+        rate_governor: TokenBucket = None,
+        connection_stats: ConnectionStats = None,
+        pool_maxsize: int = 10,
 ) -> requests.Session:
     session = session or requests.Session()
-    retry = Retry(
+    retry = GovernedRetry(
         total=retries,
         read=retries,
         connect=retries,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
+        rate_governor=rate_governor,
+    )
+    adapter = GovernedHTTPAdapter(
+        rate_governor=rate_governor,
+        connection_stats=connection_stats,
+        max_retries=retry,
+        pool_maxsize=pool_maxsize,
     )
-    adapter = HTTPAdapter(max_retries=retry)
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
@@ -1,59 +1,164 @@
+import io
 import os
 import tempfile
-import itertools
+import time
 import zipfile
-import requests
-from datetime import datetime
-from retry import requests_retry_session
-from config import USER_AGENT
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+from psycopg2.extras import execute_values
+from sec_client import get_sync_session, SEC_THROTTLE_MESSAGE
 from fastapi import HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from db import get_db
-from models import Ticker, Filing
+from models import FilingIndexDay
+from master_index import FilingRecord, batched, iter_master_idx
+from sync_validators import conditional_headers, record_modified, record_not_modified
+
+# Called by the sync functions with a dict describing how far they got, e.g. by the job runner
+ProgressCallback = Callable[[Dict[str, Any]], None]
 
 BASE_URL = "https://www.sec.gov/Archives/edgar/full-index"
+COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+DAILY_INDEX_URL = "https://www.sec.gov/Archives/edgar/daily-index"
+# EDGAR sometimes publishes a daily index late; a missing index within this many business days is retried, not skipped
+DAILY_INDEX_GRACE_DAYS = 3
+
+
+def business_days_before(day: date, count: int) -> date:
+    """Return the date `count` business days before `day`; holidays are not known here and count as business days."""
+    while count > 0:
+        day -= timedelta(days=1)
+        if day.weekday() < 5:
+            count -= 1
+    return day
+
+
+def list_daily_indexes(session, year: int, quarter: int) -> Set[str]:
+    """
+    Return the names of the master.YYYYMMDD.idx files of a quarter, from the index.json listing of its daily-index
+    directory.
+    """
+    response = session.get(url=f"{DAILY_INDEX_URL}/{year}/QTR{quarter}/index.json")
+    response.raise_for_status()
+    return {item["name"] for item in response.json()["directory"]["item"] if item["name"].startswith("master.")}
 
 
-def update_tickers_data(testing: bool, db: Session = next(get_db())):
+def update_tickers_data(testing: bool, db: Session = next(get_db()), progress: Optional[ProgressCallback] = None):
     if testing:
         return {"status": "success", "message": "Test mode: ticker update skipped."}
 
     try:
-        response = requests.get(
-            "https://www.sec.gov/files/company_tickers.json",
-            headers={"User-agent": USER_AGENT},
+        response = get_sync_session().get(
+            COMPANY_TICKERS_URL,
+            headers=conditional_headers(db, COMPANY_TICKERS_URL),
             timeout=10
         )
+        if response.status_code == 304:
+            record_not_modified(db, COMPANY_TICKERS_URL)
+            return {"status": "success", "not_modified": True, "message": "company_tickers.json has not changed."}
         response.raise_for_status()
         data = response.json()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fetch failed: {str(e)}")
 
+    if progress:
+        progress({"stage": "upserting", "tickers": len(data)})
+
     try:
-        tickers_updated = 0
+        start = time.perf_counter()
+        now = datetime.utcnow()
+
+        # company_tickers.json lists a CIK once per share class; like before, the last entry wins.
+        # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement, so duplicates are dropped here.
+        tickers = {}
         for entry in data.values():
-            ticker = db.query(Ticker).filter(Ticker.cik == str(entry['cik_str'])).first()
-            if ticker:
-                ticker.name = entry.get("title")
-                ticker.symbol = entry.get("ticker")
-            else:
-                new_ticker = Ticker(
-                    cik=str(entry['cik_str']),
-                    name=entry.get("title"),
-                    symbol=entry.get("ticker")
-                )
-                db.add(new_ticker)
-            tickers_updated += 1
+            tickers[str(entry['cik_str'])] = (str(entry['cik_str']), entry.get("title"), entry.get("ticker"), now, now)
 
+        # Rows whose name and symbol did not change are left alone and not returned;
+        # xmax = 0 tells the freshly inserted rows apart from the updated ones
+        upsert_query = """
+            INSERT INTO tickers (cik, name, symbol, created_at, updated_at)
+            VALUES %s
+            ON CONFLICT (cik) DO UPDATE SET
+                name = EXCLUDED.name,
+                symbol = EXCLUDED.symbol,
+                updated_at = EXCLUDED.updated_at
+            WHERE tickers.name IS DISTINCT FROM EXCLUDED.name
+               OR tickers.symbol IS DISTINCT FROM EXCLUDED.symbol
+            RETURNING (xmax = 0) AS inserted
+        """
+        cur = db.connection().connection.cursor()
+        try:
+            changed = execute_values(cur, upsert_query, list(tickers.values()), page_size=1000, fetch=True)
+        finally:
+            cur.close()
+        record_modified(db, COMPANY_TICKERS_URL, response)
         db.commit()
-        return {"status": "success", "tickers_updated": tickers_updated}
+
+        inserted = sum(1 for (was_inserted,) in changed if was_inserted)
+        updated = len(changed) - inserted
+        unchanged = len(tickers) - len(changed)
+        elapsed = round(time.perf_counter() - start, 2)
+        print(f"Tickers synced in {elapsed}s: {inserted} inserted, {updated} updated, {unchanged} unchanged")
+
+        return {
+            "status": "success",
+            "tickers_updated": len(tickers),
+            "inserted": inserted,
+            "updated": updated,
+            "unchanged": unchanged,
+            "elapsed_seconds": elapsed
+        }
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
-# TODO FIX THIS
-def update_filings_data(testing: bool, db: Session = next(get_db())):
+# Rows sent to the database per INSERT statement
+FILINGS_BATCH_SIZE = 10000
+
+
+def insert_filings(db: Session, entries: Iterable[FilingRecord],
+                   progress: Optional[ProgressCallback] = None) -> Tuple[int, int]:
+    """
+    Insert filings in batches, skipping the ones that are already stored.
+
+    Like seed_data/seed_filings.py, the ticker of every filing is resolved by joining on the CIK;
+    filings of companies without a ticker are left out.
+
+    Args:
+        db (Session): Database session, committed by the caller.
+        entries (Iterable[FilingRecord]): Filings as yielded by iter_master_idx.
+        progress (Optional[ProgressCallback]): Called with the counts after every batch.
+
+    Returns:
+        Tuple[int, int]: Number of filings read and number of filings inserted.
+    """
+    insert_query = """
+        INSERT INTO filings (ticker_id, filing_type, filing_date, filing_url, created_at, updated_at)
+        SELECT t.id, v.filing_type, v.filing_date, v.filing_url, v.now, v.now
+        FROM (VALUES %s) AS v(cik, filing_type, filing_date, filing_url, now)
+        JOIN tickers t ON t.cik = v.cik
+        ON CONFLICT (filing_url) DO NOTHING
+        RETURNING 1
+    """
+    now = datetime.utcnow()
+    read = inserted = 0
+    cur = db.connection().connection.cursor()
+    try:
+        for batch in batched(entries, FILINGS_BATCH_SIZE):
+            values = [(record.cik, record.form_type, record.date_filed, record.filename, now) for record in batch]
+            inserted += len(execute_values(cur, insert_query, values, page_size=FILINGS_BATCH_SIZE, fetch=True))
+            read += len(batch)
+            if progress:
+                progress({"stage": "inserting", "filings_read": read, "filings_inserted": inserted})
+    finally:
+        cur.close()
+    return read, inserted
+
+
+def update_filings_data(testing: bool, db: Session = next(get_db()), progress: Optional[ProgressCallback] = None):
     if testing:
         return {"status": "success", "message": "Test mode: filing update skipped."}
 
@@ -67,59 +172,133 @@ def update_filings_data(testing: bool, db: Session = next(get_db())):
     try:
         with tempfile.TemporaryFile(mode="w+b") as tmp:
             retries_exceeded = True
+            session = get_sync_session()
             for _ in range(5):
-                session = requests.Session()
-                req = requests_retry_session(
-                    retries=5, backoff_factor=0.2, session=session
-                ).get(url=url, headers={"User-agent": USER_AGENT})
+                req = session.get(url=url, headers=conditional_headers(db, url))
 
-                if "will be managed until action is taken to declare your traffic." not in req.text:
+                if SEC_THROTTLE_MESSAGE not in req.text:
                     retries_exceeded = False
                     break
 
             if retries_exceeded:
                 return {"status": "error", "message": f"Retries exceeded for {url}"}
 
+            if req.status_code == 304:
+                record_not_modified(db, url)
+                return {
+                    "status": "success",
+                    "not_modified": True,
+                    "filings_processed": 0,
+                    "quarter": quarter_key,
+                    "timestamp": now.isoformat()
+                }
+
             tmp.write(req.content)
             tmp.seek(0)
 
-            filings_processed = 0
+            start = time.perf_counter()
             with zipfile.ZipFile(tmp).open("master.idx") as f:
-                lines = [
-                    line.decode("latin-1")
-                    for line in itertools.islice(f, 11, None)
-                ]
-                entries = [line.strip().split("|") for line in lines if len(line.strip().split("|")) == 5]
-
-            for entry in entries:
-                cik, company_name, form_type, date_filed, txt_filename = entry
-                
-                # Check if filing already exists
-                existing_filing = db.query(Filing).filter(
-                    Filing.filing_url == txt_filename
-                ).first()
-                
-                if not existing_filing:
-                    new_filing = Filing(
-                        cik=cik,
-                        company_name=company_name,
-                        form_type=form_type,
-                        date_filed=date_filed,
-                        filing_url=txt_filename,
-                        quarter=quarter_key
-                    )
-                    db.add(new_filing)
-                    filings_processed += 1
-
+                filings_read, filings_processed = insert_filings(db, iter_master_idx(f), progress)
+            record_modified(db, url, req)
             db.commit()
+            elapsed = round(time.perf_counter() - start, 2)
+            print(f"{quarter_key}: inserted {filings_processed} of {filings_read} filings in {elapsed}s")
 
             return {
                 "status": "success",
                 "filings_processed": filings_processed,
+                "filings_read": filings_read,
                 "quarter": quarter_key,
+                "elapsed_seconds": elapsed,
                 "timestamp": now.isoformat()
             }
 
     except Exception as e:
         db.rollback()
         return {"status": "error", "message": f"Download or processing failed: {str(e)}"}
+
+
+def update_filings_daily(testing: bool, db: Session = next(get_db()), progress: Optional[ProgressCallback] = None):
+    """
+    Ingest the filings of every day since the last run from EDGAR's daily index files.
+
+    Each day's master.YYYYMMDD.idx only holds that day's filings, so a run downloads and inserts a few thousand
+    rows instead of the whole quarter. Processed days are recorded in filing_index_days; the first run starts at
+    the beginning of the current quarter, later ones at the day after the latest recorded day.
+
+    A weekday whose index is missing stops the run, so it is tried again next time, unless it is older than
+    DAILY_INDEX_GRACE_DAYS business days and absent from the directory listing of its quarter. Only then it is
+    recorded as a holiday (published=False), which is final.
+    """
+    if testing:
+        return {"status": "success", "message": "Test mode: daily filing update skipped."}
+
+    start = time.perf_counter()
+    today = datetime.utcnow().date()
+    latest = db.query(func.max(FilingIndexDay.day)).scalar()
+    if latest is None:
+        day = date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+    else:
+        day = latest + timedelta(days=1)
+
+    session = get_sync_session()
+    grace_start = business_days_before(today, DAILY_INDEX_GRACE_DAYS)
+    listings: Dict[Tuple[int, int], Set[str]] = {}
+    days_processed, filings_read, filings_processed = 0, 0, 0
+    waiting_for = None
+    try:
+        while day <= today:
+            if day.weekday() >= 5:
+                # EDGAR does not publish daily indexes for weekends
+                db.merge(FilingIndexDay(day=day, published=False, filings_read=0, filings_inserted=0))
+                db.commit()
+                day += timedelta(days=1)
+                continue
+
+            quarter = (day.month - 1) // 3 + 1
+            url = f"{DAILY_INDEX_URL}/{day.year}/QTR{quarter}/master.{day:%Y%m%d}.idx"
+            req = session.get(url=url)
+            if req.status_code == 404:
+                if day >= grace_start:
+                    # Possibly not published yet, try again on the next run
+                    waiting_for = day
+                    break
+                if (day.year, quarter) not in listings:
+                    listings[(day.year, quarter)] = list_daily_indexes(session, day.year, quarter)
+                if f"master.{day:%Y%m%d}.idx" in listings[(day.year, quarter)]:
+                    # Listed but not served, a transient error
+                    waiting_for = day
+                    break
+                # A holiday
+                db.merge(FilingIndexDay(day=day, published=False, filings_read=0, filings_inserted=0))
+                db.commit()
+                day += timedelta(days=1)
+                continue
+            if not req.ok or SEC_THROTTLE_MESSAGE in req.text:
+                return {"status": "error", "message": f"Could not download {url}: HTTP {req.status_code}"}
+
+            read, inserted = insert_filings(db, iter_master_idx(io.BytesIO(req.content)))
+            # Recorded in the same transaction as its filings, so a day is either fully ingested or retried
+            db.merge(FilingIndexDay(day=day, published=True, filings_read=read, filings_inserted=inserted))
+            db.commit()
+            print(f"{day}: inserted {inserted} of {read} filings")
+
+            days_processed += 1
+            filings_read += read
+            filings_processed += inserted
+            if progress:
+                progress({"day": day, "days_processed": days_processed, "filings_processed": filings_processed})
+            day += timedelta(days=1)
+    except Exception as e:
+        db.rollback()
+        return {"status": "error", "message": f"Download or processing failed: {str(e)}"}
+
+    return {
+        "status": "success",
+        "days_processed": days_processed,
+        "filings_read": filings_read,
+        "filings_processed": filings_processed,
+        "high_water_mark": db.query(func.max(FilingIndexDay.day)).scalar(),
+        "waiting_for": waiting_for,
+        "elapsed_seconds": round(time.perf_counter() - start, 2),
+    }
@@ -0,0 +1,398 @@
+import codecs
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows - every process rescans and evicts on its own
+    fcntl = None
+
+from config import SEC_CACHE_DIR, SEC_CACHE_MAX_BYTES
+
+# Only documents under /Archives/ are immutable once EDGAR publishes them.
+# Anything else (company_tickers.json, full-index/, daily-index/) changes over time and must not be cached here.
+CACHEABLE_PREFIX = "/Archives/edgar/data/"
+
+# A process re-scans the directory after writing this share of max_bytes, to account for the entries of the others
+RESCAN_FRACTION = 16
+# Temporary files older than this are leftovers of interrupted writes; newer ones may be written by another process
+STALE_TMP_SECONDS = 3600
+LOCK_FILE_NAME = ".lock"
+
+
+class DocumentCache:
+    """
+    Persistent, size-bounded cache for EDGAR archive documents.
+
+    Entries are keyed by the archive path of the document (e.g. /Archives/edgar/data/320193/.../aapl-20230930.htm),
+    stored zlib-compressed under a file name derived from the SHA-256 of that path, and evicted least-recently-used
+    first once the total compressed size exceeds max_bytes.
+
+    Several processes (API workers, scripts) can share the directory. The file mtime is the last access time, and the
+    size and LRU order kept in memory are only this process's view: they are rebuilt from the directory, under an
+    exclusive lock on its .lock file, on first use, whenever the view exceeds max_bytes and after every
+    max_bytes / RESCAN_FRACTION written by this process. Eviction happens during that rescan, so the directory
+    exceeds max_bytes by at most that share per process between rescans.
+
+    Attributes:
+        directory (str): Root directory of the cache.
+        max_bytes (int): Upper bound for the compressed size of all entries.
+        hits (int): Number of lookups served from disk.
+        misses (int): Number of lookups that had to go to the SEC.
+        evictions (int): Number of entries removed to stay under max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # file path -> size, oldest first
+        self._total_bytes = 0
+        self._written_since_scan = 0
+        # The directory is scanned on first use rather than on import, so importing sec_client stays cheap
+        self._loaded = False
+
+    @staticmethod
+    def cache_key(url: str) -> Optional[str]:
+        """
+        Return the archive path used as the cache key for a URL, or None if the URL is not cacheable.
+
+        Args:
+            url (str): Full sec.gov URL or archive path.
+
+        Returns:
+            Optional[str]: The archive path, or None.
+        """
+        path = urlparse(url).path
+        if not path.startswith(CACHEABLE_PREFIX):
+            return None
+        return path
+
+    def get(self, url: str) -> Optional[str]:
+        """
+        Return the cached document for a URL, or None on a miss.
+
+        Args:
+            url (str): Full sec.gov URL of the document.
+
+        Returns:
+            Optional[str]: The decoded document text.
+        """
+        key = self.cache_key(url)
+        if key is None:
+            return None
+        self._ensure_loaded()
+
+        file_path = self._file_path(key)
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+            text = zlib.decompress(data).decode("utf-8")
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+                self._forget(file_path)
+            return None
+        except (OSError, zlib.error, UnicodeDecodeError) as err:
+            # A truncated or corrupt entry is treated as a miss and dropped
+            print(f"Discarding unreadable cache entry for {key}: {err}")
+            with self._lock:
+                self.misses += 1
+                self._remove(file_path)
+            return None
+
+        with self._lock:
+            self.hits += 1
+            if file_path in self._entries:
+                self._entries.move_to_end(file_path)
+        try:
+            # The mtime doubles as the last access time when the index is rebuilt on startup
+            os.utime(file_path)
+        except OSError:
+            pass
+        return text
+
+    def iter_text(self, url: str, chunk_size: int = 64 * 1024) -> Optional[Iterator[str]]:
+        """
+        Return the cached document for a URL as an iterator of decoded text chunks, or None on a miss.
+
+        Unlike get(), the document is decompressed while it is read, so only one chunk of it is in memory at a time.
+        The iterator must be exhausted or closed to release the file.
+
+        Args:
+            url (str): Full sec.gov URL of the document.
+            chunk_size (int): Number of compressed bytes read per chunk.
+
+        Returns:
+            Optional[Iterator[str]]: The decoded document text in chunks.
+        """
+        key = self.cache_key(url)
+        if key is None:
+            return None
+        self._ensure_loaded()
+
+        file_path = self._file_path(key)
+        try:
+            f = open(file_path, "rb")
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                self._forget(file_path)
+            return None
+
+        with self._lock:
+            self.hits += 1
+            if file_path in self._entries:
+                self._entries.move_to_end(file_path)
+        try:
+            os.utime(file_path)
+        except OSError:
+            pass
+        return self._read_chunks(f, file_path, key, chunk_size)
+
+    def _read_chunks(self, f, file_path: str, key: str, chunk_size: int) -> Iterator[str]:
+        decompressor = zlib.decompressobj()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        with f:
+            try:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    text = decoder.decode(decompressor.decompress(data))
+                    if text:
+                        yield text
+                text = decoder.decode(decompressor.flush(), final=True)
+                if not decompressor.eof:
+                    raise zlib.error("truncated entry")
+            except (OSError, zlib.error, UnicodeDecodeError) as err:
+                # Part of the document may have been sent already, so the reader has to see the failure
+                print(f"Discarding unreadable cache entry for {key}: {err}")
+                with self._lock:
+                    self._remove(file_path)
+                raise
+        if text:
+            yield text
+
+    def open_writer(self, url: str) -> Optional["CacheWriter"]:
+        """
+        Start storing a document for a URL chunk by chunk. Non-archive URLs are ignored.
+
+        Args:
+            url (str): Full sec.gov URL of the document.
+
+        Returns:
+            Optional[CacheWriter]: The writer, or None if the document cannot be cached.
+        """
+        key = self.cache_key(url)
+        if key is None:
+            return None
+        self._ensure_loaded()
+
+        file_path = self._file_path(key)
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            return CacheWriter(self, key, file_path)
+        except OSError as err:
+            print(f"Could not write cache entry for {key}: {err}")
+            return None
+
+    def set(self, url: str, text: str) -> None:
+        """
+        Store a document for a URL. Non-archive URLs are ignored.
+
+        Args:
+            url (str): Full sec.gov URL of the document.
+            text (str): The decoded document text.
+        """
+        writer = self.open_writer(url)
+        if writer is not None:
+            writer.write(text)
+            writer.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the hit/miss counters and current size of the cache, as of this process's last rescan.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _file_path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        # Shard by the first two hex chars so no single directory grows too large
+        return os.path.join(self.directory, digest[:2], f"{digest}.z")
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if not self._loaded:
+                os.makedirs(self.directory, exist_ok=True)
+                self._rescan()
+                self._loaded = True
+
+    @contextmanager
+    def _directory_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(os.path.join(self.directory, LOCK_FILE_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _rescan(self) -> None:
+        """
+        Rebuild the LRU order from the files on disk, using mtime as the last access time, and evict down to
+        max_bytes. Caller must hold self._lock.
+        """
+        with self._directory_lock():
+            found = []
+            stale_before = time.time() - STALE_TMP_SECONDS
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name == LOCK_FILE_NAME:
+                        continue
+                    file_path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(file_path)
+                    except OSError:
+                        continue
+                    if name.endswith(".tmp"):
+                        if stat.st_mtime < stale_before:
+                            # Leftover from an interrupted write
+                            try:
+                                os.remove(file_path)
+                            except OSError:
+                                pass
+                        continue
+                    found.append((stat.st_mtime, file_path, stat.st_size))
+
+            self._entries.clear()
+            self._total_bytes = 0
+            for _, file_path, size in sorted(found):
+                self._entries[file_path] = size
+                self._total_bytes += size
+            self._written_since_scan = 0
+            self._evict()
+
+    def _add(self, file_path: str, size: int) -> None:
+        with self._lock:
+            self._forget(file_path)
+            self._entries[file_path] = size
+            self._total_bytes += size
+            self._written_since_scan += size
+            if self._total_bytes > self.max_bytes or self._written_since_scan > self.max_bytes / RESCAN_FRACTION:
+                self._rescan()
+
+    def _evict(self) -> None:
+        # Caller must hold self._lock and the directory lock
+        while self._total_bytes > self.max_bytes and self._entries:
+            file_path, _ = next(iter(self._entries.items()))
+            self._remove(file_path)
+            self.evictions += 1
+
+    def _forget(self, file_path: str) -> None:
+        # Caller must hold self._lock
+        size = self._entries.pop(file_path, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _remove(self, file_path: str) -> None:
+        # Caller must hold self._lock
+        self._forget(file_path)
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
+class CacheWriter:
+    """
+    Compresses a document into a temporary file as it is written and moves it into the cache on commit(),
+    so concurrent readers never see a partial entry.
+
+    Documents whose compressed size exceeds the cache size are dropped instead of committed.
+    """
+
+    def __init__(self, cache: DocumentCache, key: str, file_path: str) -> None:
+        self.cache = cache
+        self.key = key
+        self.file_path = file_path
+        self._compressor = zlib.compressobj(6)
+        self._size = 0
+        fd, self._tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, text: str) -> None:
+        """
+        Append a chunk of the decoded document text.
+        """
+        if self._file is None:
+            return
+        self._append(self._compressor.compress(text.encode("utf-8")))
+
+    def commit(self) -> None:
+        """
+        Finish the entry and add it to the cache.
+        """
+        if self._file is None:
+            return
+        self._append(self._compressor.flush())
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+            self._file = None
+            os.replace(self._tmp_path, self.file_path)
+        except OSError as err:
+            print(f"Could not write cache entry for {self.key}: {err}")
+            self.abort()
+            return
+        self.cache._add(self.file_path, self._size)
+
+    def abort(self) -> None:
+        """
+        Discard the entry, e.g. when the download failed halfway.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+    def _append(self, data: bytes) -> None:
+        self._size += len(data)
+        if self._size > self.cache.max_bytes:
+            self.abort()
+            return
+        try:
+            self._file.write(data)
+        except OSError as err:
+            print(f"Could not write cache entry for {self.key}: {err}")
+            self.abort()
+
+
+document_cache = DocumentCache(SEC_CACHE_DIR, SEC_CACHE_MAX_BYTES)
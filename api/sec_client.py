@@ -0,0 +1,240 @@
+import asyncio
+import random
+import threading
+from typing import AsyncIterator, Iterator, Optional
+import httpx
+import requests
+from config import USER_AGENT
+from retry import ConnectionStats, requests_retry_session
+from sec_cache import document_cache
+from sec_rate import sec_governor
+
+try:
+    import h2  # noqa: F401 - only needed so httpx can negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# SEC answers with this page instead of the document when it considers our traffic undeclared/too fast
+SEC_THROTTLE_MESSAGE = "will be managed until action is taken to declare your traffic."
+
+# Same statuses as requests_retry_session in retry.py, plus 429 Too Many Requests
+RETRY_STATUSES = (400, 401, 403, 429, 500, 502, 503, 504, 505)
+
+# Characters of a streamed response that are checked for the throttling page before streaming starts
+SEC_THROTTLE_PEEK = 16 * 1024
+
+# Upper bound of connections kept open to sec.gov per client; the rate governor limits throughput anyway
+SEC_POOL_SIZE = 10
+
+_async_client: Optional[httpx.AsyncClient] = None
+_sync_session: Optional[requests.Session] = None
+_sync_session_lock = threading.Lock()
+
+async_connection_stats = ConnectionStats()
+sync_connection_stats = ConnectionStats()
+
+
+def get_sync_session() -> requests.Session:
+    """
+    Return the shared requests Session used for all synchronous sec.gov requests (cron syncs).
+
+    The session is created once per process and is safe to use from several threads. Its connections
+    are kept alive and reused across requests, and every request and retry goes through the SEC rate governor.
+    """
+    global _sync_session
+    with _sync_session_lock:
+        if _sync_session is None:
+            session = requests.Session()
+            session.headers.update({"User-Agent": USER_AGENT})
+            _sync_session = requests_retry_session(
+                retries=5,
+                backoff_factor=0.2,
+                session=session,
+                rate_governor=sec_governor,
+                connection_stats=sync_connection_stats,
+                pool_maxsize=SEC_POOL_SIZE,
+            )
+        return _sync_session
+
+
+def connection_stats() -> dict:
+    """
+    Return request and new-connection counters for both clients.
+    """
+    return {
+        "sync": sync_connection_stats.stats(),
+        "async": async_connection_stats.stats(),
+    }
+
+
+async def _trace_connections(event_name: str, info: dict) -> None:
+    # httpcore reports every newly opened TCP connection through the "trace" request extension
+    if event_name == "connection.connect_tcp.complete":
+        async_connection_stats.record_connection()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the shared AsyncClient used for all asynchronous sec.gov requests.
+
+    The client is created on first use and keeps its connections alive between requests,
+    so concurrent fetches share one connection pool instead of paying a new TCP+TLS handshake each.
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=2 * SEC_POOL_SIZE,
+                max_keepalive_connections=SEC_POOL_SIZE,
+                keepalive_expiry=30
+            ),
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            follow_redirects=True,
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """
+    Close the shared AsyncClient. Called on application shutdown.
+    """
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def fetch_document(url: str, retries: int = 5, backoff_factor: float = 0.2) -> Optional[str]:
+    """
+    Download a document from sec.gov without blocking the event loop, serving it from the
+    on-disk document cache when possible.
+
+    Failed attempts (network errors, retryable statuses or the SEC throttling page) are retried
+    with exponential backoff and jitter.
+
+    Args:
+        url (str): Full sec.gov URL of the document.
+        retries (int): Maximum number of attempts.
+        backoff_factor (float): Base delay in seconds, doubled after every failed attempt.
+
+    Returns:
+        Optional[str]: The document text, or None if it could not be downloaded.
+    """
+    cached = await asyncio.to_thread(document_cache.get, url)
+    if cached is not None:
+        return cached
+
+    client = get_async_client()
+    for attempt in range(retries):
+        # Every attempt counts against the SEC allowance shared with the cron jobs
+        await sec_governor.acquire_async()
+        try:
+            async_connection_stats.record_request()
+            response = await client.get(url, extensions={"trace": _trace_connections})
+        except httpx.TransportError as err:
+            print(f"Request for {url} failed due to network-related error: {err}")
+        else:
+            if response.status_code not in RETRY_STATUSES and SEC_THROTTLE_MESSAGE not in response.text:
+                # Error pages must not end up in the cache, only the actual documents
+                if response.is_success:
+                    await asyncio.to_thread(document_cache.set, url, response.text)
+                return response.text
+
+        if attempt < retries - 1:
+            await asyncio.sleep(backoff_factor * (2 ** attempt) + random.uniform(0, backoff_factor))
+
+    print(f'Retries exceeded, could not download "{url}"')
+    return None
+
+
+async def open_document_stream(url: str, retries: int = 5, backoff_factor: float = 0.2) -> Optional[AsyncIterator[str]]:
+    """
+    Start downloading a document from sec.gov and return its text as it arrives, serving it from the
+    on-disk document cache when possible.
+
+    Attempts are retried like in fetch_document until the response looks like the document. Since the document is
+    not held in memory as a whole, only its first SEC_THROTTLE_PEEK characters are checked for the throttling page.
+    A successful download is written to the document cache while it is streamed.
+
+    Args:
+        url (str): Full sec.gov URL of the document.
+        retries (int): Maximum number of attempts.
+        backoff_factor (float): Base delay in seconds, doubled after every failed attempt.
+
+    Returns:
+        Optional[AsyncIterator[str]]: The document text in chunks, or None if it could not be downloaded.
+            Network errors after streaming started are raised by the iterator.
+    """
+    cached = await asyncio.to_thread(document_cache.iter_text, url)
+    if cached is not None:
+        return _iter_cached(cached)
+
+    client = get_async_client()
+    for attempt in range(retries):
+        await sec_governor.acquire_async()
+        response = None
+        try:
+            async_connection_stats.record_request()
+            request = client.build_request("GET", url, extensions={"trace": _trace_connections})
+            response = await client.send(request, stream=True)
+            if response.status_code not in RETRY_STATUSES:
+                chunks = response.aiter_text()
+                head = ""
+                async for chunk in chunks:
+                    head += chunk
+                    if len(head) >= SEC_THROTTLE_PEEK:
+                        break
+                if SEC_THROTTLE_MESSAGE not in head:
+                    stream = _iter_response(url, response, head, chunks)
+                    # The stream closes the response from now on
+                    response = None
+                    return stream
+        except httpx.TransportError as err:
+            print(f"Request for {url} failed due to network-related error: {err}")
+        finally:
+            if response is not None:
+                await response.aclose()
+
+        if attempt < retries - 1:
+            await asyncio.sleep(backoff_factor * (2 ** attempt) + random.uniform(0, backoff_factor))
+
+    print(f'Retries exceeded, could not download "{url}"')
+    return None
+
+
+async def _iter_cached(chunks: Iterator[str]) -> AsyncIterator[str]:
+    try:
+        while True:
+            # Reading and decompressing happens off the event loop
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        chunks.close()
+
+
+async def _iter_response(url: str, response: httpx.Response, head: str,
+                         chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    # Error pages must not end up in the cache, only the actual documents
+    writer = await asyncio.to_thread(document_cache.open_writer, url) if response.is_success else None
+    try:
+        if head:
+            if writer is not None:
+                await asyncio.to_thread(writer.write, head)
+            yield head
+        async for chunk in chunks:
+            if writer is not None:
+                await asyncio.to_thread(writer.write, chunk)
+            yield chunk
+        if writer is not None:
+            await asyncio.to_thread(writer.commit)
+            writer = None
+    finally:
+        if writer is not None:
+            # Download failed or the client went away before the end, the entry would be truncated
+            writer.abort()
+        await response.aclose()
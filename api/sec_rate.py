@@ -0,0 +1,133 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows - fall back to per-process limiting
+    fcntl = None
+
+from config import SEC_MAX_REQUESTS_PER_SECOND, SEC_RATE_LOCK_FILE
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    Tokens are refilled continuously at `rate` per second up to `capacity`; every request takes one token
+    and waits until one is available. Any one-second window therefore sees at most `capacity + rate` requests.
+
+    When `lock_file` is given (and fcntl is available), the bucket state lives in that file and is updated
+    under an exclusive lock, so all processes using the same file draw from the same bucket.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum number of tokens that can be saved up for a burst.
+        lock_file (Optional[str]): Path of the shared state file, or None for an in-process bucket.
+        acquired (int): Number of tokens handed out by this process.
+        waited (float): Total seconds this process spent waiting for tokens.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1, lock_file: Optional[str] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.lock_file = lock_file if fcntl else None
+        self.acquired = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = time.time()
+
+    def acquire(self) -> None:
+        """
+        Block the calling thread until a token is available.
+        """
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return
+            self._record_wait(wait)
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """
+        Wait without blocking the event loop until a token is available.
+        """
+        while True:
+            if self.lock_file:
+                # The shared state is read and written under a blocking file lock another process may be holding
+                wait = await asyncio.to_thread(self._take)
+            else:
+                wait = self._take()
+            if wait <= 0:
+                return
+            self._record_wait(wait)
+            await asyncio.sleep(wait)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return the counters of this process.
+        """
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "shared": self.lock_file is not None,
+                "acquired": self.acquired,
+                "waited_seconds": round(self.waited, 3),
+            }
+
+    def _record_wait(self, wait: float) -> None:
+        with self._lock:
+            self.waited += wait
+
+    def _take(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the number of seconds until the next one is available.
+        """
+        with self._lock:
+            if self.lock_file:
+                wait = self._take_shared()
+            else:
+                self._tokens, self._updated, wait = self._refill_and_take(self._tokens, self._updated)
+            if wait <= 0:
+                self.acquired += 1
+            return wait
+
+    def _take_shared(self) -> float:
+        # Caller must hold self._lock; the file lock serializes the other processes
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, 64).decode("ascii", errors="ignore").split()
+            try:
+                tokens, updated = float(raw[0]), float(raw[1])
+            except (IndexError, ValueError):
+                tokens, updated = self.capacity, time.time()
+
+            tokens, updated, wait = self._refill_and_take(tokens, updated)
+
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, f"{tokens:.6f} {updated:.6f}".encode("ascii"))
+            return wait
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _refill_and_take(self, tokens: float, updated: float):
+        now = time.time()
+        tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, now, 0.0
+        return tokens, now, (1 - tokens) / self.rate
+
+
+# The single governor every request to sec.gov has to go through.
+# The burst token counts towards the limit too, hence the refill rate of one less than the allowance.
+sec_governor = TokenBucket(SEC_MAX_REQUESTS_PER_SECOND - 1, capacity=1, lock_file=SEC_RATE_LOCK_FILE)
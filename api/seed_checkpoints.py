@@ -0,0 +1,61 @@
+"""
+Description: Checkpoints of the master.idx seeding scripts (seed_data/seed_filings.py, masterdata/seed_masterdata_debug.py).
+
+A quarter is checkpointed in the same transaction that loads it, so after a crash every quarter is either loaded and
+checkpointed or neither, and the next run skips exactly the finished ones without counting rows. A checkpoint is only
+valid for the master.idx size it was made with, so the still growing current quarter is loaded again once it changed.
+Works on plain psycopg2 cursors, as the seeding scripts do not use the ORM.
+"""
+import os
+from typing import Dict
+
+
+def quarter_of(idx_file: str) -> str:
+    """Return the quarter of a {year}_QTR{n}/master.idx path, e.g. 1993_QTR1."""
+    return os.path.basename(os.path.dirname(os.path.abspath(idx_file)))
+
+
+def load_checkpoints(cur, target: str) -> Dict[str, int]:
+    """
+    Return the seeded quarters of a target table.
+
+    Args:
+        cur: psycopg2 cursor.
+        target (str): The seeded table, e.g. filings.
+
+    Returns:
+        Dict[str, int]: The master.idx size each quarter was seeded with, by quarter.
+    """
+    cur.execute("SELECT quarter, idx_bytes FROM seed_checkpoints WHERE target = %s", (target,))
+    return dict(cur.fetchall())
+
+
+def is_seeded(checkpoints: Dict[str, int], idx_file: str) -> bool:
+    """Check whether a master.idx was seeded as it is now on disk."""
+    return checkpoints.get(quarter_of(idx_file)) == os.path.getsize(idx_file)
+
+
+def record_checkpoint(cur, target: str, quarter: str, idx_bytes: int, rows_read: int, rows_inserted: int,
+                      seconds: float) -> None:
+    """
+    Checkpoint a seeded quarter. Not committed here: the caller commits it together with the rows of the quarter.
+
+    Args:
+        cur: psycopg2 cursor.
+        target (str): The seeded table, e.g. filings.
+        quarter (str): The seeded quarter, e.g. 1993_QTR1.
+        idx_bytes (int): Size of the master.idx, taken before it was read.
+        rows_read (int): Rows read from the master.idx.
+        rows_inserted (int): Rows inserted into the target table.
+        seconds (float): Time the quarter took.
+    """
+    cur.execute("""
+        INSERT INTO seed_checkpoints (target, quarter, idx_bytes, rows_read, rows_inserted, seconds, completed_at)
+        VALUES (%s, %s, %s, %s, %s, %s, NOW())
+        ON CONFLICT (target, quarter) DO UPDATE SET
+            idx_bytes = EXCLUDED.idx_bytes,
+            rows_read = EXCLUDED.rows_read,
+            rows_inserted = EXCLUDED.rows_inserted,
+            seconds = EXCLUDED.seconds,
+            completed_at = EXCLUDED.completed_at
+    """, (target, quarter, idx_bytes, rows_read, rows_inserted, round(seconds, 2)))
@@ -1,13 +1,30 @@
+"""
+Description: Backfills the filings table from the quarterly master.idx files downloaded by
+masterdata/download_masterdata.py.
+
+Every quarter is streamed straight from its master.idx into a temporary staging table with COPY FROM STDIN and then
+merged into filings with one INSERT ... SELECT, joined to tickers on the CIK. Quarters are loaded in parallel, by a
+pool of worker processes that each reuse one database connection, and the rows/second of every quarter and of the
+whole run are reported.
+
+Every loaded quarter is checkpointed in seed_checkpoints in the same transaction, so an interrupted run resumes with
+the quarters that are not loaded yet (see seed_checkpoints.py); --force loads every quarter again.
+
+Usage (from the api directory):
+    python seed_data/seed_filings.py
+    python seed_data/seed_filings.py --source masterdatadownload --workers 8
+    python seed_data/seed_filings.py --force
+"""
+import argparse
+import atexit
 import os
-import itertools
-from datetime import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, Optional
 from tqdm import tqdm
-from sqlalchemy import text
-from sqlalchemy.orm import Session
 import sys
 from pathlib import Path
 import psycopg2
-from psycopg2.extras import execute_values
 
 # Add the api directory to the Python path
 api_dir = str(Path(__file__).resolve().parent.parent)
@@ -15,99 +32,186 @@ if api_dir not in sys.path:
     sys.path.append(api_dir)
 
 from config import DATABASE_URL
-from db import engine, get_db
-
-def parse_master_idx(file_path):
-    """Parse master index file and return list of (cik, name, form, date, txt) tuples."""
-    with open(file_path, "rb") as f:
-        lines = [
-            line.decode("latin-1").strip()
-            for line in itertools.islice(f, 11, None)  # start after dashed line
-            if "|" in line.decode("latin-1")
-        ]
-        results = []
-        for line in lines:
-            cik, name, form, date, txt = line.split("|")
-            results.append((cik.strip(), name.strip(), form.strip(), date.strip(), txt.strip()))
-        return results
-
-def insert_filing_batch(filing_data: list, batch_size: int = 10000):
-    """Insert a batch of filings using psycopg2.extras.execute_values."""
-    # Connect directly with psycopg2
-    conn = psycopg2.connect(DATABASE_URL)
-    cur = conn.cursor()
-    
-    try:
-        # Convert filing_data dict list to tuple list for execute_values
-        values = [
-            (data['cik'], data['filing_type'], data['filing_date'], data['filing_url'])
-            for data in filing_data
-        ]
-        
-        # Insert directly into filings table with a JOIN
-        insert_query = """
-            INSERT INTO filings (ticker_id, filing_type, filing_date, filing_url, created_at, updated_at)
-            SELECT t.id, v.filing_type, v.filing_date, v.filing_url, NOW(), NOW()
-            FROM tickers t
-            JOIN (VALUES %s) AS v(cik, filing_type, filing_date, filing_url)
-                ON t.cik = v.cik
-        """
-        
-        print(f"Inserting {len(values)} records...")
-        execute_values(cur, insert_query, values, page_size=batch_size)
-        
-        conn.commit()
-        print(f"Successfully processed batch")
-        
-    except Exception as e:
-        conn.rollback()
-        print(f"Error inserting batch: {e}")
-    finally:
-        cur.close()
-        conn.close()
-
-def seed_filings():
-    """Seed filings data from master index files."""
-    print("Starting filings seeding process...")
-    
-    # Get all quarter folders
-    base_path = os.path.join(os.path.dirname(__file__), "masterdatadownload")
-    quarter_folders = sorted([
-        f for f in os.listdir(base_path) 
-        if os.path.isdir(os.path.join(base_path, f))
-    ])
+from master_index import FilingRecord, read_master_idx
+from seed_checkpoints import is_seeded, load_checkpoints, quarter_of, record_checkpoint
+
+CHECKPOINT_TARGET = "filings"
+
+# Backslash, tab, newline and carriage return have to be escaped in COPY's text format
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+CREATE_STAGING_TABLE = """
+    CREATE TEMP TABLE IF NOT EXISTS filings_staging (
+        cik TEXT,
+        filing_type TEXT,
+        filing_date DATE,
+        filing_url TEXT
+    )
+"""
+
+MERGE_STAGING_TABLE = """
+    INSERT INTO filings (ticker_id, filing_type, filing_date, filing_url, created_at, updated_at)
+    SELECT t.id, s.filing_type, s.filing_date, s.filing_url, NOW(), NOW()
+    FROM filings_staging s
+    JOIN tickers t ON t.cik = s.cik
+    ON CONFLICT (filing_url) DO NOTHING
+"""
+
+# Connection of the worker process, opened once by init_worker
+_conn = None
+
+
+class CopyStream:
+    """
+    File-like object that renders filing records as COPY text rows on demand, for cursor.copy_expert.
+
+    Only as many records are parsed as the COPY asks for, so a quarter never has to fit in memory.
+
+    Attributes:
+        rows (int): Number of records rendered so far.
+    """
+
+    def __init__(self, records: Iterable[FilingRecord]) -> None:
+        self._lines = (self._render(record) for record in records)
+        self._rest = b""
+        self.rows = 0
+
+    def _render(self, record: FilingRecord) -> bytes:
+        self.rows += 1
+        fields = (record.cik, record.form_type, record.date_filed.isoformat(), record.filename)
+        return ("\t".join(field.translate(COPY_ESCAPES) for field in fields) + "\n").encode("utf-8")
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = [self._rest]
+        length = len(self._rest)
+        if size < 0 or length < size:
+            for line in self._lines:
+                chunks.append(line)
+                length += len(line)
+                if 0 <= size <= length:
+                    break
+        data = b"".join(chunks)
+        if size < 0:
+            self._rest = b""
+            return data
+        self._rest = data[size:]
+        return data[:size]
 
+
+def init_worker(database_url: str) -> None:
+    """Open the connection of a worker process and its staging table."""
+    global _conn
+    _conn = psycopg2.connect(database_url)
+    atexit.register(_conn.close)
+    with _conn.cursor() as cur:
+        cur.execute(CREATE_STAGING_TABLE)
+    _conn.commit()
+
+
+def load_quarter(idx_file: str) -> Dict[str, float]:
+    """
+    Copy the filings of one master.idx into the staging table, merge them into filings and checkpoint the quarter,
+    in one transaction.
+
+    Args:
+        idx_file (str): Path of the master.idx (or master.zip).
+
+    Returns:
+        Dict[str, float]: Rows read from the index, rows inserted into filings, and the time taken.
+    """
+    start = time.perf_counter()
+    idx_bytes = os.path.getsize(idx_file)
+    stream = CopyStream(read_master_idx(idx_file, on_malformed=report_malformed))
     try:
-        for quarter in tqdm(quarter_folders, desc="Processing quarters"):
-            idx_file = os.path.join(base_path, quarter, "master.idx")
-            if not os.path.exists(idx_file):
+        with _conn.cursor() as cur:
+            cur.execute("TRUNCATE filings_staging")
+            cur.copy_expert("COPY filings_staging (cik, filing_type, filing_date, filing_url) FROM STDIN", stream)
+            cur.execute("ANALYZE filings_staging")
+            cur.execute(MERGE_STAGING_TABLE)
+            inserted = cur.rowcount
+            record_checkpoint(cur, CHECKPOINT_TARGET, quarter_of(idx_file), idx_bytes, stream.rows, inserted,
+                              time.perf_counter() - start)
+        _conn.commit()
+    except Exception:
+        _conn.rollback()
+        raise
+
+    return {"read": stream.rows, "inserted": inserted, "seconds": time.perf_counter() - start}
+
+
+def report_malformed(line: bytes):
+    print(f"Skipping malformed line: {line[:200]!r}")
+
+
+def list_quarter_files(source: str) -> Iterator[str]:
+    """Yield the master.idx of every quarter folder in source, oldest first."""
+    for quarter in sorted(os.listdir(source)):
+        idx_file = os.path.join(source, quarter, "master.idx")
+        if os.path.isdir(os.path.join(source, quarter)):
+            if os.path.exists(idx_file):
+                yield idx_file
+            else:
                 print(f"Skipping {quarter} - no master.idx file found")
+
+
+def seed_filings(source: Optional[str] = None, workers: int = 4, force: bool = False):
+    """
+    Seed filings data from master index files.
+
+    Args:
+        source (Optional[str]): Folder holding one {year}_QTR{n}/master.idx per quarter.
+        workers (int): Quarters loaded at the same time, each by its own process and connection.
+        force (bool): Also load the quarters that are checkpointed already.
+    """
+    print("Starting filings seeding process...")
+    source = source or os.path.join(os.path.dirname(__file__), "masterdatadownload")
+    idx_files = list(list_quarter_files(source))
+
+    if not force:
+        conn = psycopg2.connect(DATABASE_URL)
+        try:
+            with conn.cursor() as cur:
+                checkpoints = load_checkpoints(cur, CHECKPOINT_TARGET)
+        finally:
+            conn.close()
+        seeded = [idx_file for idx_file in idx_files if is_seeded(checkpoints, idx_file)]
+        idx_files = [idx_file for idx_file in idx_files if idx_file not in seeded]
+        print(f"Skipping {len(seeded)} quarters that are already seeded")
+
+    start = time.perf_counter()
+    total_read = total_inserted = failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(DATABASE_URL,)) as executor:
+        # Largest quarters first, so a big one does not start last and leave the other workers idle
+        futures = {
+            executor.submit(load_quarter, idx_file): idx_file
+            for idx_file in sorted(idx_files, key=os.path.getsize, reverse=True)
+        }
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Processing quarters"):
+            quarter = quarter_of(futures[future])
+            try:
+                stats = future.result()
+            except Exception as e:
+                failed += 1
+                tqdm.write(f"Error loading {quarter}: {e}")
                 continue
+            total_read += stats["read"]
+            total_inserted += stats["inserted"]
+            tqdm.write(
+                f"{quarter}: {stats['read']} read, {stats['inserted']} inserted in {stats['seconds']:.1f}s "
+                f"({stats['read'] / max(stats['seconds'], 1e-9):,.0f} rows/s)"
+            )
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Loaded {len(idx_files) - failed}/{len(idx_files)} quarters: {total_read} read, {total_inserted} inserted "
+        f"in {elapsed:.1f}s ({total_read / max(elapsed, 1e-9):,.0f} rows/s)"
+    )
 
-            print(f"\nProcessing {quarter}...")
-            filings = parse_master_idx(idx_file)
-            
-            # Group filings by CIK for bulk insert
-            filing_data = []
-            for cik, _, form, date, txt in tqdm(filings, desc="Parsing filings"):
-                try:
-                    filing_date = datetime.strptime(date, "%Y-%m-%d").date()
-                    filing_data.append({
-                        "cik": cik,
-                        "filing_type": form,
-                        "filing_date": filing_date,
-                        "filing_url": txt
-                    })
-                except ValueError as e:
-                    print(f"Error parsing date {date}: {e}")
-                    continue
-
-            if filing_data:
-                print(f"Processing {len(filing_data)} filings...")
-                insert_filing_batch(filing_data)
-
-    except Exception as e:
-        print(f"Error during seeding: {e}")
 
 if __name__ == "__main__":
-    seed_filings() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="Folder with the {year}_QTR{n}/master.idx files")
+    parser.add_argument("--workers", type=int, default=4, help="Quarters loaded at the same time")
+    parser.add_argument("--force", action="store_true", help="Also load the quarters that are already seeded")
+    args = parser.parse_args()
+    seed_filings(args.source, args.workers, args.force)
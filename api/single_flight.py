@@ -0,0 +1,64 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+
+    The first caller for a key starts the work as a task; every caller that arrives while it is still running waits
+    for that same task and gets its result (or exception). The task is shielded from the callers, so one caller
+    going away (e.g. a client disconnecting) does not cancel the work the others are waiting for.
+    Results are not kept once the work is done; caching is up to the caller.
+
+    Attributes:
+        started (int): Number of executions started.
+        coalesced (int): Number of calls that joined an execution that was already running.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the result of work(), sharing a running execution for the same key if there is one.
+
+        Args:
+            key (Hashable): Identifies identical work, e.g. the requested file name.
+            work (Callable[[], Awaitable[Any]]): Creates the coroutine doing the work; only called when starting.
+
+        Returns:
+            Any: The result of the work.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller went away before it was raised
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the counters and the number of executions currently running.
+        """
+        return {
+            "in_flight": len(self._in_flight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+# Shared by the /filing-content routes, keys are prefixed with the route
+filing_flights = SingleFlight()
@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import Any, Dict, List
+import requests
+from sqlalchemy.orm import Session
+from models import SyncValidator
+
+
+def conditional_headers(db: Session, url: str) -> Dict[str, str]:
+    """
+    Return the headers that make a request for a URL conditional on the document having changed since the last
+    processed download.
+
+    Args:
+        db (Session): Database session.
+        url (str): The URL about to be downloaded.
+
+    Returns:
+        Dict[str, str]: If-None-Match and/or If-Modified-Since, empty if the URL was never processed.
+    """
+    validator = db.get(SyncValidator, url)
+    headers = {}
+    if validator is not None:
+        if validator.etag:
+            headers["If-None-Match"] = validator.etag
+        if validator.last_modified:
+            headers["If-Modified-Since"] = validator.last_modified
+    return headers
+
+
+def record_not_modified(db: Session, url: str) -> None:
+    """
+    Count a run that was skipped because the server answered 304 Not Modified, and commit it.
+
+    Args:
+        db (Session): Database session.
+        url (str): The downloaded URL.
+    """
+    validator = _get_or_create(db, url)
+    validator.runs += 1
+    validator.not_modified += 1
+    validator.checked_at = datetime.utcnow()
+    db.commit()
+
+
+def record_modified(db: Session, url: str, response: requests.Response) -> None:
+    """
+    Remember the validators of a download once it has been processed.
+
+    Not committed here: the caller commits it together with the data of the download, so a run that fails halfway
+    downloads the document again next time instead of skipping it.
+
+    Args:
+        db (Session): Database session.
+        url (str): The downloaded URL.
+        response (requests.Response): The response of the download.
+    """
+    validator = _get_or_create(db, url)
+    validator.etag = response.headers.get("ETag")
+    validator.last_modified = response.headers.get("Last-Modified")
+    validator.runs += 1
+    validator.checked_at = validator.changed_at = datetime.utcnow()
+
+
+def validator_stats(db: Session) -> List[Dict[str, Any]]:
+    """
+    Return the validators and run counters of every URL.
+    """
+    return [
+        {
+            "url": validator.url,
+            "etag": validator.etag,
+            "last_modified": validator.last_modified,
+            "runs": validator.runs,
+            "not_modified": validator.not_modified,
+            "checked_at": validator.checked_at,
+            "changed_at": validator.changed_at,
+        }
+        for validator in db.query(SyncValidator).order_by(SyncValidator.url).all()
+    ]
+
+
+def _get_or_create(db: Session, url: str) -> SyncValidator:
+    validator = db.get(SyncValidator, url)
+    if validator is None:
+        validator = SyncValidator(url=url, runs=0, not_modified=0)
+        db.add(validator)
+    return validator
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Request, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc, case
+from sqlalchemy import or_, desc, case, func
 from sqlalchemy.sql.expression import literal
 from typing import List
 from db import get_db
@@ -11,6 +11,71 @@ from slowapi.util import get_remote_address
 router = APIRouter(tags=["tickers"])
 limiter = Limiter(key_func=get_remote_address)
 
+# Queries shorter than a trigram only match at the start of a symbol or name
+MIN_SUBSTRING_QUERY = 3
+
+
+def escape_like(value: str) -> str:
+    """Escape the LIKE wildcards in user input, for patterns with ESCAPE '\\'."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_query(db: Session, query: str, limit: int):
+    """
+    Build the query of /tickers/search, also EXPLAINed by benchmarks/audit_queries.py.
+
+    Results are ranked: exact symbol match first, then symbol prefix, then name prefix, then the rest. On PostgreSQL
+    the filter is served by the pg_trgm GIN indexes on name and symbol, names similar to the query (typos) match too,
+    and ties are ordered by trigram similarity. Other databases (SQLite in tests) get the same filter and ranks, with
+    ties ordered by where the query appears in the name and by name length instead of similarity.
+
+    Args:
+        db (Session): Database session.
+        query (str): The search text.
+        limit (int): Maximum number of tickers.
+    """
+    query = query.strip()
+    prefix = f"{escape_like(query)}%"
+    postgresql = db.get_bind().dialect.name == "postgresql"
+
+    if len(query) < MIN_SUBSTRING_QUERY:
+        condition = or_(
+            Ticker.symbol.ilike(prefix, escape="\\"),
+            Ticker.name.ilike(prefix, escape="\\")
+        )
+    else:
+        pattern = f"%{escape_like(query)}%"
+        condition = or_(
+            Ticker.symbol.ilike(pattern, escape="\\"),
+            Ticker.name.ilike(pattern, escape="\\"),
+            *([Ticker.name.op("%")(query)] if postgresql else [])
+        )
+
+    rank = case(
+        (func.upper(Ticker.symbol) == query.upper(), literal(0)),
+        (Ticker.symbol.ilike(prefix, escape="\\"), literal(1)),
+        (Ticker.name.ilike(prefix, escape="\\"), literal(2)),
+        else_=literal(3)
+    )
+    if postgresql:
+        relevance = [desc(func.greatest(
+            func.similarity(Ticker.name, query),
+            func.similarity(func.coalesce(Ticker.symbol, ""), query)
+        ))]
+    else:
+        relevance = [func.instr(func.lower(Ticker.name), query.lower()), func.length(Ticker.name)]
+
+    return db.query(Ticker).filter(condition).order_by(
+        rank,
+        *relevance,
+        # Prioritize non-null symbols
+        case(
+            (Ticker.symbol.is_(None), literal(2)),  # Null symbols get lowest priority
+            else_=literal(1)                        # Non-null symbols get higher priority
+        ),
+        Ticker.name
+    ).limit(limit)
+
 @router.get("/search")
 @limiter.limit("300/minute")
 async def search_tickers(
@@ -20,23 +85,7 @@ async def search_tickers(
     db: Session = Depends(get_db)
 ):
     """Search tickers by name or symbol."""
-    if not query:
+    if not query.strip():
         return []
-        
-    search_query = f"%{query}%"
-    
-    results = db.query(Ticker).filter(
-        or_(
-            Ticker.name.ilike(search_query),
-            Ticker.symbol.ilike(search_query)
-        )
-    ).order_by(
-        # Prioritize non-null symbols
-        case(
-            (Ticker.symbol.is_(None), literal(2)),  # Null symbols get lowest priority
-            else_=literal(1)                        # Non-null symbols get higher priority
-        ),
-        Ticker.name
-    ).limit(limit).all()
-    
-    return results
+
+    return search_query(db, query, limit).all()